@@ -1,6 +1,11 @@
 import os
+import shutil
+import logging
+import argparse
+import tempfile
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from src.data_loader import DataLoader
 from src.data_validator import DataValidator
 from src.data_cleaner import DataCleaner
@@ -9,13 +14,16 @@ from src.config import (
     PROCESSED_DATA_DIR, 
     PROCESSED_DATA_SEPARATE_FILES_DIR,
     PROCESSED_DATA_WITH_FUELS_FILE_DIR,
+    PROCESSED_DATA_SEGMENTS_DIR,
     FUELS_DATA_DIR,
     METADATA_DIR, 
     LOGS_DIR, 
     RAW_PARQUET_DATA_DIR, 
     RAUGH_CSV_DATA_DIR, 
     RAUGH_XLSX_DATA_DIR, 
-    RAUGH_PARQUT_DATA_DIR
+    RAUGH_PARQUT_DATA_DIR,
+    STABLE_DETECTORS,
+    ASYNC_LOGGING
 )
 from src.metadata_manager import MetadataManager
 from src.log_manager import LogManager
@@ -23,6 +31,10 @@ from src.data_visualizer import DataVisualizer
 from src.data_transformation import DataTransformation
 from src.data_filter import DataFilter
 from src.data_add_to_df import AddAdditionalDataToEachFile
+from src.build_manifest import BuildManifest, pipeline_code_hash
+from src.arrow_store import arrow_path, save_arrow
+from src.segment_summary import save_segments, summarize_segments
+from src.pipeline_profiler import PipelineProfiler
 import json
 
 required_columns_for_validation_step = [
@@ -57,19 +69,51 @@ fuel_file = os.path.join(FUELS_DATA_DIR, 'fuels.json')
 with open(fuel_file, 'r') as f:
     fuels_data = json.load(f)
 
+# Parameters that change the processed files; part of the build manifest fingerprint
+pipeline_parameters = {
+    "required_columns_for_validation_step": required_columns_for_validation_step,
+    "stable_detectors": STABLE_DETECTORS,
+    "use_full_en_column_name": False,
+}
 
-def process_file(item: dict, metadata_manager: MetadataManager, log_manager: LogManager) -> None:
-    """Process a single item (file) through the entire data pipeline."""
+BUILD_MANIFEST_FILE_NAME = 'build_manifest.json'
+
+
+def get_output_path(item: dict) -> str:
+    """Path of the processed parquet file of an item."""
+    return os.path.join(PROCESSED_DATA_WITH_FUELS_FILE_DIR, f"{item['main_file_name']}_tr_f.parquet")
+
+
+def get_segments_output_path(item: dict) -> str:
+    """Path of the stable segment summary of an item."""
+    return os.path.join(PROCESSED_DATA_SEGMENTS_DIR, f"{item['main_file_name']}_segments.parquet")
+
+
+def process_file(item: dict, metadata_manager: MetadataManager, log_manager: LogManager,
+                 emit_arrow: bool = False, emit_segments: bool = False,
+                 profiler: PipelineProfiler = None) -> bool:
+    """
+    Process a single item (file) through the entire data pipeline.
+    With emit_arrow, an Arrow IPC copy of the processed file is saved next to the parquet file.
+    With emit_segments, a summary with one row per stable segment is saved to PROCESSED_DATA_SEGMENTS_DIR.
+    Wall time, CPU time, peak RSS and rows in/out of every step are recorded in the profiler.
+
+    Returns:
+    - True if the processed file was saved.
+    """
+    profiler = profiler or PipelineProfiler(log_manager=log_manager)
     json_item_id = item['id']
     main_file_name = item['main_file_name']
     eco_file_name = item['eco_file_name']
     fuel_name = item['fuel']
+    log_manager.set_context(file_id=json_item_id, file_name=main_file_name, fuel=fuel_name)
 
     input_file_path = os.path.join(RAW_PARQUET_DATA_DIR, main_file_name)
     
     if not os.path.exists(input_file_path):
         log_manager.log_error(f"!!!---File with ID:{json_item_id} not found: {input_file_path}.---!!!")
-        return
+        log_manager.log_event('file_completed', status='missing')
+        return False
     
     log_manager.log_info(f"!!================================={json_item_id}========================================!!")
     log_manager.log_info(f"json_item_id: {json_item_id}")
@@ -89,14 +133,19 @@ def process_file(item: dict, metadata_manager: MetadataManager, log_manager: Log
         metadata_manager.update_metadata(step_2_file_name, 'step_name', 'Load raw data')
         metadata_manager.update_metadata(step_2_file_name, 'step_2_start_time', str(datetime.now()))
 
-        data_loader = DataLoader( 
-            raw_data_path=RAW_PARQUET_DATA_DIR,
-            names_of_files_under_procession=names_of_files_under_procession,
-            json_path=json_path,
-            metadata_manager=metadata_manager, 
-            log_manager=log_manager
-        )
-        raw_data_frames = data_loader.select_from_json_and_load_data(selected_id=json_item_id)
+        with profiler.step(json_item_id, 'load') as record:
+            data_loader = DataLoader( 
+                raw_data_path=RAW_PARQUET_DATA_DIR,
+                names_of_files_under_procession=names_of_files_under_procession,
+                json_path=json_path,
+                metadata_manager=metadata_manager, 
+                log_manager=log_manager
+            )
+            raw_data_frames = data_loader.select_from_json_and_load_data(
+                selected_id=json_item_id,
+                columns=required_columns_for_validation_step
+            )
+            record['rows_out'] = len(raw_data_frames[0])
 
         metadata_manager.update_metadata(step_2_file_name, 'step_2_status', 'completed')
         metadata_manager.update_metadata(step_2_file_name, 'step_2_end_time', str(datetime.now()))
@@ -109,34 +158,36 @@ def process_file(item: dict, metadata_manager: MetadataManager, log_manager: Log
         metadata_manager.update_metadata(step_3_file_name, 'step_name', 'Validate data')
         metadata_manager.update_metadata(step_3_file_name, 'step_3_start_time', str(datetime.now()))
 
-        # don't use "required_columns_eco"
-        required_columns_list = [required_columns_for_validation_step, required_columns_eco]
-        validator = DataValidator(
-            raw_data_frames, 
-            required_columns_list=required_columns_list, 
-            file_names=[main_file_name, eco_file_name],
-            names_of_files_under_procession=names_of_files_under_procession,
-            log_manager=log_manager,
-            metadata_manager=metadata_manager
-        )
-        validation_results = validator.validate_columns()
-        for idx, result in enumerate(validation_results):
-            if not result["valid"]:
-                # Handle missing columns for each DataFrame
-                validator.handle_missing_columns(fill_value=0)
-                log_manager.log_info(f"DataFrame {idx}: Missing required columns filled with default values.")
-
-        # Schema validation
-        expected_schemas = [
-            {col: 'numeric' for col in required_columns_for_validation_step},
-            {col: 'numeric' for col in required_columns_eco}
-        ]
-        validator.validate_schema(expected_schemas)
-        validator.check_for_duplicate_columns()
-        
-        reports = validator.generate_report()
-        for report in reports:
-            log_manager.log_info(report)
+        with profiler.step(json_item_id, 'validate', rows_in=len(raw_data_frames[0])) as record:
+            # don't use "required_columns_eco"
+            required_columns_list = [required_columns_for_validation_step, required_columns_eco]
+            validator = DataValidator(
+                raw_data_frames, 
+                required_columns_list=required_columns_list, 
+                file_names=[main_file_name, eco_file_name],
+                names_of_files_under_procession=names_of_files_under_procession,
+                log_manager=log_manager,
+                metadata_manager=metadata_manager
+            )
+            validation_results = validator.validate_columns()
+            for idx, result in enumerate(validation_results):
+                if not result["valid"]:
+                    # Handle missing columns for each DataFrame
+                    validator.handle_missing_columns(fill_value=0)
+                    log_manager.log_info(f"DataFrame {idx}: Missing required columns filled with default values.")
+
+            # Schema validation
+            expected_schemas = [
+                {col: 'numeric' for col in required_columns_for_validation_step},
+                {col: 'numeric' for col in required_columns_eco}
+            ]
+            validator.validate_schema(expected_schemas)
+            validator.check_for_duplicate_columns()
+            
+            reports = validator.generate_report()
+            for report in reports:
+                log_manager.log_info(report)
+            record['rows_out'] = len(raw_data_frames[0])
 
         log_manager.log_info("Step 3: Data validated successfully.")
         metadata_manager.update_metadata(step_3_file_name, 'validation_results', validation_results)
@@ -145,7 +196,8 @@ def process_file(item: dict, metadata_manager: MetadataManager, log_manager: Log
 
         # Step 4: Extract metadata
         step_4_file_name = f"Step 4. Item with ID:{json_item_id}. Files: {files_for_steps}"
-        validator.get_metadata([raw_data_frames[0]], message_for_logs="DataFrame after Loadding:")
+        with profiler.step(json_item_id, 'metadata', rows_in=len(raw_data_frames[0])):
+            validator.get_metadata([raw_data_frames[0]], message_for_logs="DataFrame after Loadding:")
         metadata_manager.update_metadata(step_4_file_name, 'step_4_status', 'completed')
         metadata_manager.update_metadata(step_4_file_name, 'step_4_end_time', str(datetime.now()))
         log_manager.log_info("Step 4: Metadata extracted successfully.")
@@ -165,10 +217,16 @@ def process_file(item: dict, metadata_manager: MetadataManager, log_manager: Log
             log_manager=log_manager
         )
 
-        data_filter.filter_columns()
-        data_filter.synchronize_time()
-        data_filter.filter_all_stable_periods()
-        filtered_df = data_filter.delete_fuel_column_avr_or_current()
+        with profiler.step(json_item_id, 'filter', rows_in=len(data_filter.df)) as record:
+            data_filter.filter_columns()
+            record['rows_out'] = len(data_filter.df)
+        with profiler.step(json_item_id, 'synchronize', rows_in=len(data_filter.df)) as record:
+            data_filter.synchronize_time()
+            record['rows_out'] = len(data_filter.df)
+        with profiler.step(json_item_id, 'stable_detection', rows_in=len(data_filter.df)) as record:
+            data_filter.filter_all_stable_periods()
+            filtered_df = data_filter.delete_fuel_column_avr_or_current()
+            record['rows_out'] = len(filtered_df)
 
         validator.get_metadata([filtered_df], message_for_logs="DataFrame after filtering:")
         metadata_manager.update_metadata(step_5_file_name, 'step_5_status', 'completed')
@@ -179,36 +237,43 @@ def process_file(item: dict, metadata_manager: MetadataManager, log_manager: Log
         # Step 7: Transform data
         step_6_file_name = f"Step 6. Item with ID:{json_item_id}. Files: {files_for_steps}"
         log_manager.log_info("Step 6: Transforming data...")
-        data_transformation = DataTransformation(
-            df=filtered_df,
-            names_of_files_under_procession=names_of_files_under_procession,
-            log_manager=log_manager,
-            metadata_manager=metadata_manager
-        )
-
-        corrected_df = data_transformation.atmospheric_power_correction(show_corrections=True)
-        corrected_df = data_transformation.exhaust_gas_mean_temperature_calculation()
+        with profiler.step(json_item_id, 'transform', rows_in=len(filtered_df)) as record:
+            data_transformation = DataTransformation(
+                df=filtered_df,
+                names_of_files_under_procession=names_of_files_under_procession,
+                log_manager=log_manager,
+                metadata_manager=metadata_manager
+            )
+
+            corrected_df = data_transformation.atmospheric_power_correction(show_corrections=True)
+            corrected_df = data_transformation.exhaust_gas_mean_temperature_calculation()
+            record['rows_out'] = len(corrected_df)
         validator.get_metadata([corrected_df], message_for_logs="DataFrame after data transformation:")
 
         #Step 8: Add fuel data
         step_8_file_name = f"Step 8. Item with ID:{json_item_id}. Files: {files_for_steps}"
         log_manager.log_info("Step 8: Adding fuel data...")
+        columns_before_fuel = len(corrected_df.columns)
         
-        add_fuel_obj = AddAdditionalDataToEachFile(
-            df=corrected_df,
-            names_of_files_under_procession=names_of_files_under_procession,
-            fuels_data=fuels_data,
-            metadata_manager=metadata_manager,
-            log_manager=log_manager
-        )
-        df_with_fuel = add_fuel_obj.add_fuel()
+        with profiler.step(json_item_id, 'add_fuel', rows_in=len(corrected_df)) as record:
+            add_fuel_obj = AddAdditionalDataToEachFile(
+                df=corrected_df,
+                names_of_files_under_procession=names_of_files_under_procession,
+                fuels_data=fuels_data,
+                metadata_manager=metadata_manager,
+                log_manager=log_manager
+            )
+            df_with_fuel = add_fuel_obj.add_fuel()
+            record['rows_out'] = len(df_with_fuel)
         validator.get_metadata([df_with_fuel], message_for_logs="DataFrame after adding fuels properties:")
         metadata_manager.update_metadata(step_8_file_name, 'step_8_status', 'completed')
         metadata_manager.update_metadata(step_8_file_name, 'step_8_end_time', str(datetime.now()))
         log_manager.log_info("Step 8: Fuel data added successfully.")
 
         #Step 9: Rename_polish_columns_to_english
-        df_with_en_column_names = add_fuel_obj.rename_polish_columns_to_english(use_full_en_column_name = False)
+        with profiler.step(json_item_id, 'rename', rows_in=len(df_with_fuel)) as record:
+            df_with_en_column_names = add_fuel_obj.rename_polish_columns_to_english(use_full_en_column_name = False)
+            record['rows_out'] = len(df_with_en_column_names)
         validator.get_metadata([df_with_en_column_names], message_for_logs="Column's list after Rename_polish_columns_to_english:")
         metadata_manager.update_metadata(step_8_file_name, 'step_9_status', 'completed')
         metadata_manager.update_metadata(step_8_file_name, 'step_9_end_time', str(datetime.now()))
@@ -216,35 +281,201 @@ def process_file(item: dict, metadata_manager: MetadataManager, log_manager: Log
 
         # Save transformed data
         #transformed_data_parquet_path = os.path.join(PROCESSED_DATA_SEPARATE_FILES_DIR, f'transformed_data_{main_file_name}.parquet')
-        transformed_data_parquet_path = os.path.join(PROCESSED_DATA_WITH_FUELS_FILE_DIR, f'{main_file_name}_tr_f.parquet')
-        df_with_en_column_names.to_parquet(transformed_data_parquet_path, index=False)
+        with profiler.step(json_item_id, 'save', rows_in=len(df_with_en_column_names)) as record:
+            transformed_data_parquet_path = get_output_path(item)
+            df_with_en_column_names.to_parquet(transformed_data_parquet_path, index=False)
+            if emit_arrow:
+                save_arrow(df_with_en_column_names, arrow_path(transformed_data_parquet_path))
+            record['rows_out'] = len(df_with_en_column_names)
+        if emit_segments:
+            with profiler.step(json_item_id, 'segments', rows_in=len(df_with_en_column_names)) as record:
+                # The fuel properties are the columns appended by add_fuel (renaming keeps the order)
+                summary = summarize_segments(
+                    df_with_en_column_names,
+                    data_filter.stable_intervals,
+                    static_columns=list(df_with_en_column_names.columns[columns_before_fuel:]),
+                    metadata={
+                        'item_id': json_item_id,
+                        'main_file_name': main_file_name,
+                        'fuel': fuel_name,
+                        'test_date': item.get('test_date'),
+                    }
+                )
+                save_segments(summary, get_segments_output_path(item))
+                record['rows_out'] = len(summary)
+            log_manager.log_info(f"{len(summary)} stable segments saved for {len(df_with_en_column_names)} rows.")
 
         # Pipeline completed for this file
         log_manager.log_info(f"!!--Data pipeline completed successfully for file with"
                              f"ID:{json_item_id}: {main_file_name}.--!!!")
         metadata_manager.update_metadata(step_8_file_name, 'pipeline_status', 'completed')
+        log_manager.log_event('file_completed', status='ok', rows_out=len(df_with_en_column_names))
+        return True
 
     except Exception as e:
         log_manager.log_error(f"An error occurred: {e}")
         metadata_manager.update_metadata("pipeline_error", 'pipeline_status', f'error: {e}')
         metadata_manager.update_metadata("pipeline_error", 'error_time', str(datetime.now()))
-
-
-def main():
+        log_manager.log_event('file_completed', status='error')
+        return False
+
+    finally:
+        # Item boundary: persist the buffered metadata updates of this item
+        metadata_manager.flush()
+        log_manager.set_context(file_id=None, file_name=None, fuel=None)
+
+
+def _init_worker() -> None:
+    """Drop log handlers inherited from the parent process (fork start method)."""
+    logging.getLogger('LogManager').handlers.clear()
+    logging.getLogger('LogManager.events').handlers.clear()
+
+
+def _process_file_in_worker(item: dict, worker_dir: str, emit_arrow: bool = False,
+                            emit_segments: bool = False) -> dict:
+    """
+    Run process_file for one item with its own log and metadata sinks.
+
+    Parameters:
+    - item: Catalog entry from json_data_links.
+    - worker_dir: Private directory for the log and metadata files of this item.
+    - emit_arrow: Also save an Arrow IPC copy of the processed file.
+    - emit_segments: Also save the stable segment summary.
+
+    Returns:
+    - Dictionary with the completion flag, the collected metadata, the log text, the profile records and the
+      structured events of this item.
+    """
+    os.makedirs(worker_dir, exist_ok=True)
+    log_manager = LogManager(logs_dir=worker_dir, names_of_files_under_procession=[], asynchronous=ASYNC_LOGGING)
+    metadata_manager = MetadataManager(metadata_dir=worker_dir, names_of_files_under_procession=[], buffered=True)
+    profiler = PipelineProfiler(log_manager=log_manager)
+    try:
+        completed = process_file(item, metadata_manager, log_manager, emit_arrow, emit_segments, profiler)
+    finally:
+        log_manager.close()
+    with open(log_manager.log_file_path, 'r', encoding='utf-8') as f:
+        log_text = f.read()
+    return {"completed": completed, "metadata": metadata_manager.metadata, "log_text": log_text,
+            "profile": profiler.records, "events": log_manager.read_events()}
+
+
+def _process_files_in_pool(items: list, workers: int,
+                           metadata_manager: MetadataManager, log_manager: LogManager,
+                           on_completed=None, emit_arrow: bool = False, emit_segments: bool = False,
+                           profiler: PipelineProfiler = None) -> None:
+    """Dispatch the items to a process pool and merge the worker sinks in catalog order."""
+    # Every item gets its own log/metadata sinks, merged in catalog order at the end
+    log_manager.log_info(f"Processing {len(items)} items with {workers} worker processes.")
+    sinks_dir = tempfile.mkdtemp(prefix='dt_engine_workers_')
+    # The fork start method starts all workers at the first submit; no listener thread may run then
+    log_manager.stop_listeners()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = [
+                executor.submit(_process_file_in_worker, item, os.path.join(sinks_dir, f"item_{idx}"),
+                                emit_arrow, emit_segments)
+                for idx, item in enumerate(items)
+            ]
+            log_manager.start_listeners()
+            for item, future in zip(items, futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    log_manager.log_error(f"Worker failed for item with ID:{item.get('id')}: {e}")
+                    continue
+                log_manager.append_log_text(result["log_text"])
+                log_manager.append_events(result["events"])
+                metadata_manager.merge_metadata(result["metadata"])
+                if profiler:
+                    profiler.merge_records(result["profile"])
+                metadata_manager.flush()
+                if result["completed"] and on_completed:
+                    on_completed(item)
+    finally:
+        log_manager.start_listeners()
+        shutil.rmtree(sinks_dir, ignore_errors=True)
+    log_manager.log_info(f"All {len(items)} items processed by the worker pool.")
+
+
+def _get_fuel_record(fuel_name: str):
+    return next((fuel for fuel in fuels_data if fuel["short_name"] == fuel_name), None)
+
+
+def main(workers: int = 1, force: bool = False, emit_arrow: bool = False, emit_segments: bool = False):
     # Initialize LogManager and MetadataManager once (assuming they can be reused)
     log_manager = LogManager(
         logs_dir=LOGS_DIR, 
-        names_of_files_under_procession=[] # Will be updated dynamically in process_file
+        names_of_files_under_procession=[], # Will be updated dynamically in process_file
+        asynchronous=ASYNC_LOGGING
     )
     metadata_manager = MetadataManager(
         metadata_dir=METADATA_DIR, 
-        names_of_files_under_procession=[]
+        names_of_files_under_procession=[],
+        buffered=True
+    )
+    manifest = BuildManifest(
+        manifest_path=os.path.join(PROCESSED_DATA_WITH_FUELS_FILE_DIR, BUILD_MANIFEST_FILE_NAME),
+        log_manager=log_manager
     )
+    profiler = PipelineProfiler(log_manager=log_manager)
+
+    # Skip the items whose raw file, fuel record, pipeline parameters and pipeline code did not change
+    items = []
+    fingerprints = {}
+    code_hash = pipeline_code_hash()
+    for item in json_data_links.get('Lublin Diesel', []):
+        input_file_path = os.path.join(RAW_PARQUET_DATA_DIR, item['main_file_name'])
+        if os.path.exists(input_file_path):
+            raw_file = manifest.file_hash(item['main_file_name'], input_file_path)
+            fingerprint = BuildManifest.fingerprint(raw_file, _get_fuel_record(item['fuel']), pipeline_parameters,
+                                                    code_hash)
+            is_up_to_date = manifest.is_up_to_date(item['main_file_name'], fingerprint, get_output_path(item))
+            if emit_arrow:
+                is_up_to_date = is_up_to_date and os.path.exists(arrow_path(get_output_path(item)))
+            if emit_segments:
+                is_up_to_date = is_up_to_date and os.path.exists(get_segments_output_path(item))
+            if not force and is_up_to_date:
+                log_manager.log_info(f"Item with ID:{item['id']} is up to date, skipped: {item['main_file_name']}")
+                continue
+            fingerprints[item['main_file_name']] = (fingerprint, raw_file)
+        items.append(item)
+    log_manager.log_info(f"{len(items)} items to process.")
+
+    def record_completed(item: dict):
+        fingerprint, raw_file = fingerprints[item['main_file_name']]
+        manifest.record(item['main_file_name'], fingerprint, raw_file, get_output_path(item))
+        manifest.save()
 
-    # Process each file in the JSON
-    for item_from_main_json in json_data_links.get('Lublin Diesel', []):
-        process_file(item_from_main_json, metadata_manager, log_manager)
+    try:
+        # Process each file in the JSON
+        if workers <= 1:
+            for item_from_main_json in items:
+                if process_file(item_from_main_json, metadata_manager, log_manager, emit_arrow, emit_segments, profiler):
+                    record_completed(item_from_main_json)
+        else:
+            _process_files_in_pool(items, workers, metadata_manager, log_manager,
+                                   on_completed=record_completed, emit_arrow=emit_arrow,
+                                   emit_segments=emit_segments, profiler=profiler)
+    finally:
+        # Compact the metadata journal into metadata_vX.json
+        metadata_manager.close()
+        # Per-step timing/memory summary of this run
+        profiler.log_summary()
+        profiler.save(os.path.join(LOGS_DIR, f"profile_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"))
+        # Last: drain the log queue and stop the listener threads
+        log_manager.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the data pipeline for all files in the JSON catalog.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes (1 = serial run).")
+    parser.add_argument('--force', action='store_true',
+                        help="Reprocess all items, even if the build manifest says they are up to date.")
+    parser.add_argument('--arrow', action='store_true',
+                        help="Also save Arrow IPC (.arrow) copies of the processed files for memory-mapped loading.")
+    parser.add_argument('--segments', action='store_true',
+                        help="Also save one row per stable segment (mean/std/min/max/count per channel).")
+    args = parser.parse_args()
+    main(workers=args.workers, force=args.force, emit_arrow=args.arrow, emit_segments=args.segments)
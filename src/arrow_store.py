@@ -0,0 +1,60 @@
+import os
+from typing import List
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+ARROW_EXTENSION = '.arrow'
+
+
+def arrow_path(parquet_path: str) -> str:
+    """
+    Path of the Arrow IPC copy of a processed parquet file (same folder, '.arrow' extension).
+    """
+    base, _ = os.path.splitext(parquet_path)
+    return base + ARROW_EXTENSION
+
+
+def save_arrow(df: pd.DataFrame, file_path: str) -> None:
+    """
+    Save a DataFrame as an uncompressed Arrow IPC (Feather v2) file.
+    Uncompressed files can be memory-mapped and read without copying.
+
+    Parameters:
+    - df: DataFrame to save.
+    - file_path: Destination path of the .arrow file.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_file_path = f"{file_path}.tmp"
+    feather.write_feather(table, tmp_file_path, compression='uncompressed')
+    os.replace(tmp_file_path, file_path)
+
+
+def open_arrow(file_path: str) -> pa.Table:
+    """
+    Open an Arrow IPC file memory-mapped. The table references the mapped pages
+    (zero-copy), so opening is almost instant and the pages are shared between processes.
+
+    Parameters:
+    - file_path: Path to the .arrow file.
+
+    Returns:
+    - pyarrow Table backed by the memory map.
+    """
+    source = pa.memory_map(file_path, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def open_arrow_files(file_paths: List[str]) -> pa.Table:
+    """
+    Open several Arrow IPC files memory-mapped as one table. The files become chunks; only columns
+    whose type differs between files (e.g. int64 vs double fuel properties) are cast.
+
+    Parameters:
+    - file_paths: Paths to the .arrow files.
+
+    Returns:
+    - pyarrow Table with the rows of all files.
+    """
+    tables = [open_arrow(file_path) for file_path in file_paths]
+    return pa.concat_tables(tables, promote_options='permissive')
@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List
+from src.log_manager import LogManager
+
+# Code whose changes change the processed files: the src package and the pipeline script
+PIPELINE_CODE_PATHS = [
+    os.path.dirname(os.path.abspath(__file__)),
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main_all_files.py'),
+]
+
+
+def pipeline_code_hash(paths: List[str] = None) -> str:
+    """
+    Content hash of the Python sources of the pipeline (all .py files of the given folders and files).
+
+    Parameters:
+    - paths: Folders and files to hash (default: PIPELINE_CODE_PATHS).
+
+    Returns:
+    - Hex digest that changes whenever a source file is added, removed or edited.
+    """
+    sha256 = hashlib.sha256()
+    for path in paths or PIPELINE_CODE_PATHS:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(folder, file_name)
+                for folder, _, file_names in os.walk(path) if '__pycache__' not in folder
+                for file_name in file_names if file_name.endswith('.py')
+            )
+            base_dir = path
+        else:
+            files = [path] if os.path.exists(path) else []
+            base_dir = os.path.dirname(path)
+        for file_path in files:
+            sha256.update(os.path.relpath(file_path, base_dir).replace(os.sep, '/').encode('utf-8'))
+            with open(file_path, 'rb') as f:
+                sha256.update(f.read())
+    return sha256.hexdigest()
+
+
+class BuildManifest:
+    """
+    Keeps a fingerprint of the inputs of every processed item, so up-to-date items can be skipped.
+    The fingerprint covers the content of the raw file, the fuel record, the pipeline parameters and
+    the pipeline code.
+    """
+
+    def __init__(self, manifest_path: str, log_manager: LogManager = None):
+        """
+        Initialize the BuildManifest.
+
+        Parameters:
+        - manifest_path: Path to the JSON manifest file.
+        - log_manager: An instance of LogManager for logging.
+        """
+        self.manifest_path = manifest_path
+        self.log_manager = log_manager
+        self.entries = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            if self.log_manager:
+                self.log_manager.log_warning(f"Corrupted build manifest {self.manifest_path}. Rebuilding all items.")
+            return {}
+
+    def save(self):
+        """
+        Write the manifest to disk (via a temporary file, so an interrupted run keeps the old manifest).
+        """
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+
+    def file_hash(self, key: str, file_path: str) -> Dict[str, Any]:
+        """
+        Content hash of a file. The hash stored for the key is reused while size and mtime are unchanged.
+
+        Parameters:
+        - key: Manifest key of the item.
+        - file_path: Path to the file.
+
+        Returns:
+        - Dictionary with 'size', 'mtime_ns' and 'sha256'.
+        """
+        stat = os.stat(file_path)
+        cached = self.entries.get(key, {}).get('raw_file', {})
+        if cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns:
+            return cached
+
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(block)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256.hexdigest()}
+
+    @staticmethod
+    def fingerprint(raw_file: Dict[str, Any], fuel_record: Any, parameters: Dict[str, Any],
+                    code_hash: str = None) -> str:
+        """
+        Combined fingerprint of the raw file hash, the fuel record, the pipeline parameters and the
+        hash of the pipeline code (see pipeline_code_hash).
+        """
+        payload = json.dumps(
+            {'raw_sha256': raw_file['sha256'], 'fuel': fuel_record, 'parameters': parameters, 'code': code_hash},
+            ensure_ascii=False, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def is_up_to_date(self, key: str, fingerprint: str, output_path: str) -> bool:
+        """
+        True if the item was built with the same fingerprint and its output still exists.
+        """
+        entry = self.entries.get(key)
+        return bool(entry) and entry.get('fingerprint') == fingerprint and os.path.exists(output_path)
+
+    def record(self, key: str, fingerprint: str, raw_file: Dict[str, Any], output_path: str):
+        """
+        Store the fingerprint of a successfully built item.
+        """
+        self.entries[key] = {
+            'fingerprint': fingerprint,
+            'raw_file': raw_file,
+            'output': os.path.basename(output_path),
+            'built_at': str(datetime.now()),
+        }
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+HLL_PRECISION = 12  # 2**12 registers per column, ~1.6 % standard error
+HLL_CHUNK_ROWS = 1 << 20  # Rows hashed at a time per column
+
+
+def _hll_estimate(registers: np.ndarray) -> np.ndarray:
+    """
+    HyperLogLog cardinality estimate from a (columns, 2**precision) array of registers.
+    """
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=1)
+    zeros = np.sum(registers == 0, axis=1)
+    # Small range correction (linear counting)
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.where(zeros > 0, zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+def approx_distinct_counts(df: pd.DataFrame, precision: int = HLL_PRECISION,
+                           chunk_rows: int = HLL_CHUNK_ROWS) -> pd.Series:
+    """
+    Approximate number of distinct non-null values per column (HyperLogLog).
+
+    The columns are hashed one at a time in chunks of chunk_rows rows and the registers are updated
+    after every chunk, so the extra memory is bounded by one chunk of one column.
+
+    Parameters:
+    - df: The DataFrame.
+    - precision: Number of index bits of the HyperLogLog (2**precision registers per column).
+    - chunk_rows: Number of rows hashed at a time.
+
+    Returns:
+    - Series of estimated distinct counts (int) indexed by the column names.
+    """
+    m = 1 << precision
+    registers = np.zeros((df.shape[1], m), dtype=np.uint8)
+
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        numeric = pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype)
+        for start in range(0, len(column), chunk_rows):
+            chunk = column.iloc[start:start + chunk_rows]
+            if numeric:
+                values = chunk.to_numpy(dtype=np.float64, na_value=np.nan)
+                # + 0.0 turns -0.0 into 0.0, like the exact count
+                hashes = pd.util.hash_array(values[~np.isnan(values)] + 0.0)
+            else:
+                hashes = pd.util.hash_pandas_object(chunk.dropna(), index=False).to_numpy()
+            index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+            remainder = hashes & np.uint64((1 << (64 - precision)) - 1)
+            # Rank = position of the leftmost 1-bit of the remaining bits (frexp exponent = bit length)
+            rank = (64 - precision) - np.frexp(remainder.astype(np.float64))[1] + 1
+            np.maximum.at(registers[position], index, rank.astype(np.uint8))
+
+    counts = np.rint(_hll_estimate(registers)).astype(np.int64)
+    counts[(registers == 0).all(axis=1)] = 0
+    return pd.Series(counts, index=df.columns)
+
+
+def column_profile(df: pd.DataFrame, distinct: str = 'exact') -> pd.DataFrame:
+    """
+    One row per column: value counts, null counts, distinct values and dtype.
+
+    Parameters:
+    - df: The DataFrame.
+    - distinct: 'exact' (nunique), 'approx' (HyperLogLog) or None (no distinct counts).
+
+    Returns:
+    - DataFrame with the columns 'Column', 'Total Values', 'Non-Null Count', 'Null Count',
+      'Unique Values' (if distinct is set) and 'Data Type'.
+    """
+    non_null = df.count().to_numpy()
+    profile = pd.DataFrame({
+        "Column": df.columns,
+        "Total Values": non_null,
+        "Non-Null Count": non_null,
+        "Null Count": len(df) - non_null,
+    })
+    if distinct == 'exact':
+        profile["Unique Values"] = df.nunique().to_numpy()
+    elif distinct == 'approx':
+        profile["Unique Values"] = approx_distinct_counts(df).to_numpy()
+    elif distinct is not None:
+        raise ValueError(f"Unknown distinct mode '{distinct}', use 'exact', 'approx' or None.")
+    profile["Data Type"] = df.dtypes.to_numpy()
+    return profile
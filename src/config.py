@@ -9,6 +9,8 @@ RAW_DATA_DIR = os.getenv('RAW_DATA_DIR', os.path.join(DATA_DIR, 'raw'))
 PROCESSED_DATA_DIR = os.getenv('PROCESSED_DATA_DIR', os.path.join(DATA_DIR, 'processed'))
 PROCESSED_DATA_SEPARATE_FILES_DIR = os.path.join(PROCESSED_DATA_DIR, 'a_main_columns_only_separate_files')
 PROCESSED_DATA_WITH_FUELS_FILE_DIR = os.path.join(PROCESSED_DATA_DIR, 'b_with_fuels_separate_files')
+PROCESSED_DATA_DATASET_DIR = os.path.join(PROCESSED_DATA_DIR, 'c_combined_dataset')  # Hive-partitioned (fuel/test_year/test_month)
+PROCESSED_DATA_SEGMENTS_DIR = os.path.join(PROCESSED_DATA_DIR, 'd_stable_segments_separate_files')  # One row per stable segment
 FUELS_DATA_DIR = os.path.join(DATA_DIR, 'fuels')
 MODELS_DIR = os.path.join(DATA_DIR, 'models')
 METADATA_DIR = os.path.join(DATA_DIR, 'metadata')
@@ -35,11 +37,40 @@ MODEL_METRICS_FILE = os.path.join(MODEL_METADATA_DIR, 'model_v1_metrics.json')
 APP_LOG_FILE = os.path.join(LOGS_DIR, 'app.log')
 TRAINING_LOG_FILE = os.path.join(LOGS_DIR, 'training.log')
 LOGGING_LEVEL = 'INFO'  # Options: DEBUG, INFO, WARNING, ERROR, CRITICAL
+ASYNC_LOGGING = True  # Pipeline logs are written by a background thread (LogManager asynchronous mode)
+DIAGNOSTICS_LEVEL = 'basic'  # Column profiles of the pipeline stages: 'off', 'basic' (counts, dtypes, no Unique Values), 'full' (+ distinct counts)
+APPROX_DISTINCT_MIN_ROWS = 1_000_000  # Frames with more rows get approximate (HyperLogLog) distinct counts
+LOG_DATAFRAME_MAX_COLUMNS = 36  # Columns rendered by LogManager.log_dataframe_in_chunks
+STRUCTURED_LOG_EVENTS = True  # Also write structured events (JSON lines) to logs/events_<run id>.jsonl
 
 # Data Processing Parameters
 DEFAULT_MISSING_VALUE_STRATEGY = 'mean'  # Options: mean, median, drop
 OUTLIER_THRESHOLD = 3.0  # Z-score threshold for outlier detection
 
+# Raw parquet ingest
+COLUMN_NAMES_FIXED_METADATA_KEY = 'column_names_fixed'  # Set in the schema metadata when names are already UTF-8 fixed
+COMPACT_MAX_DECIMALS = 6  # Channels with more decimal places stay float64
+
+# Stable period detectors of DataFilter.filter_all_stable_periods; the intervals of all detectors are intersected.
+# 'stable': max - min of the column over the trailing window ≤ threshold (all 'stable' detectors share one
+#           pass of the rolling-range engine, one detector per column); 'min_value': column ≥ min_value.
+# The entries are checked by validate_detectors (src/data_filter.py): unknown keys and duplicate columns are errors.
+STABLE_DETECTORS = [
+    {'name': 'rotation', 'type': 'stable', 'column': 'Obroty[obr/min]',
+     'threshold': 20, 'window': '8000ms', 'unit': 'RPM', 'decimals': 1},
+    {'name': 'torque', 'type': 'stable', 'column': 'Moment obrotowy[Nm]',
+     'threshold': 1.6, 'window': '8000ms', 'unit': 'Nm', 'decimals': 1,
+     'metadata_label': 'torque levels (Moment obrotowy[Nm])'},
+    {'name': 'fuel consumption', 'type': 'stable', 'column': 'Zużycie paliwa średnie[g/s]',
+     'threshold': 0.1, 'window': '8000ms', 'unit': 'g/s', 'decimals': 2},
+    {'name': 'high temperature oil', 'type': 'min_value', 'column': 'Temp. oleju w misce[°C]',
+     'min_value': 50, 'unit': '°C'},
+]
+
+# Channels that stay float64 in compacted raw files: the detector thresholds are compared on them
+# (e.g. 1.2f - 1.1f = 0.10000002 > 0.1 would move stable periods), and the fuel column choice
+COMPACT_FLOAT64_CHANNELS = [detector['column'] for detector in STABLE_DETECTORS] + ['Zużycie paliwa bieżące[g/s]']
+
 # Neural Network Configuration
 DEFAULT_BATCH_SIZE = 32
 DEFAULT_LEARNING_RATE = 0.001
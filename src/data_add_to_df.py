@@ -164,7 +164,7 @@ class AddAdditionalDataToEachFile:
         """
         if self.log_manager:
             self.log_manager.log_info(f"DataFrame shape after processing: {self.df.shape}")
-            self.log_manager.log_info(f"Columns in DataFrame: {list(self.df.columns)}")
+            self.log_manager.log_debug(lambda: f"Columns in DataFrame: {list(self.df.columns)}")
             self.log_manager.log_info(name_of_the_function)
 
     
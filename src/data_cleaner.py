@@ -15,7 +15,8 @@ class DataCleaner:
     def __init__(self, df: pd.DataFrame, 
                  names_of_files_under_procession: List[str] = None,
                  metadata_manager: MetadataManager = None, 
-                 log_manager: LogManager = None):
+                 log_manager: LogManager = None,
+                 copy: bool = True):
         """
         Initialize the DataCleaner.
 
@@ -25,10 +26,12 @@ class DataCleaner:
         - names_of_files_under_procession: A list of file names under procession.
         - metadata_manager: An instance of MetadataManager to handle metadata.
         - log_manager: An instance of LogManager for logging.
+        - copy: Work on a copy of df. False if the caller does not use df afterwards
+                (the cleaning steps return new DataFrames and do not modify df in place).
         """
         if not isinstance(df, pd.DataFrame):
             raise TypeError("Input data must be a pandas DataFrame.")
-        self.df = df.copy()
+        self.df = df.copy() if copy else df
         self.names_of_files_under_procession = names_of_files_under_procession
         self.metadata_manager = metadata_manager
         self.log_manager = log_manager
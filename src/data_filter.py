@@ -1,9 +1,60 @@
 import numpy as np
 import pandas as pd
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from src.log_manager import LogManager
 from src.metadata_manager import MetadataManager
 from src.data_cleaner import DataCleaner
+from src.time_synchronizer import TimeSynchronizer
+from src.stable_window_engine import StableWindowEngine, intersect_intervals, intervals_mask, mask_to_intervals
+from src.config import STABLE_DETECTORS
+
+
+# {detector type: (required keys, optional keys)} of the STABLE_DETECTORS entries
+DETECTOR_KEYS = {
+    'stable': ({'name', 'type', 'column', 'threshold', 'window', 'unit', 'decimals'}, {'metadata_label'}),
+    'min_value': ({'name', 'type', 'column', 'min_value'}, {'unit'}),
+}
+
+
+def validate_detectors(detectors: List[dict]) -> None:
+    """
+    Checks the detector registry before any file is processed.
+
+    Raises:
+    - ValueError: For an unknown detector type, a missing or unknown key, or two 'stable' detectors on one column
+                  (the engine keeps one rule per column).
+    """
+    stable_columns = {}
+    for position, detector in enumerate(detectors):
+        name = detector.get('name', f'#{position}')
+        if detector.get('type') not in DETECTOR_KEYS:
+            raise ValueError(f"Unknown detector type '{detector.get('type')}' of detector '{name}', "
+                             f"use one of {sorted(DETECTOR_KEYS)}.")
+        required, optional = DETECTOR_KEYS[detector['type']]
+        missing = sorted(required - detector.keys())
+        unknown = sorted(detector.keys() - required - optional)
+        if missing or unknown:
+            raise ValueError(f"Detector '{name}' ({detector['type']}): missing keys {missing}, unknown keys {unknown}.")
+        if detector['type'] == 'stable':
+            if detector['column'] in stable_columns:
+                raise ValueError(f"Detectors '{stable_columns[detector['column']]}' and '{name}' are both 'stable' "
+                                 f"detectors of column '{detector['column']}'.")
+            stable_columns[detector['column']] = name
+
+
+def stable_rules_from_detectors(detectors: List[dict]) -> Dict[str, Tuple[float, str]]:
+    """
+    {column: (threshold, window)} of the 'stable' detectors, the rules of the StableWindowEngine.
+    """
+    return {
+        detector['column']: (detector['threshold'], detector['window'])
+        for detector in detectors if detector['type'] == 'stable'
+    }
+
+
+# {column: (threshold, window)} used to identify stable periods
+validate_detectors(STABLE_DETECTORS)
+DEFAULT_STABLE_RULES = stable_rules_from_detectors(STABLE_DETECTORS)
 
 class DataFilter:
     """
@@ -15,7 +66,8 @@ class DataFilter:
                  names_of_files_under_procession: List[str] = None,
                  metadata_manager: MetadataManager = None, 
                  log_manager: LogManager = None, 
-                 data_cleaner: DataCleaner = None):
+                 data_cleaner: DataCleaner = None,
+                 detectors: List[dict] = None):
         """
         Initialize the DataFilter.
 
@@ -25,12 +77,19 @@ class DataFilter:
         - names_of_files_under_procession: A list of file names under procession.
         - metadata_manager: An instance of MetadataManager to handle metadata.
         - log_manager: An instance of LogManager for logging.
+        - detectors: Stable period detectors (default: STABLE_DETECTORS from src.config).
         """
         self.df = df
         self.required_columns = required_columns
         self.names_of_files_under_procession = names_of_files_under_procession
         self.metadata_manager = metadata_manager
         self.log_manager = log_manager
+        self.detectors = detectors or STABLE_DETECTORS
+        validate_detectors(self.detectors)
+        self.stable_rules = stable_rules_from_detectors(self.detectors)
+        self._stable_runs = None
+        self._stable_runs_df = None
+        self.stable_intervals = None
 
     # !!! 1. USED !!!
     def filter_columns(self) -> None:
@@ -53,7 +112,8 @@ class DataFilter:
             except KeyError:
                 if self.log_manager:
                     self.log_manager.log_warning(f"Column '{col_name}' not found in DataFrame.")
-        self.log_manager.log_info(f"Column pairs: {self.column_pairs}")            
+        if self.log_manager:
+            self.log_manager.log_debug(lambda: f"Column pairs: {self.column_pairs}")
         # Flatten the list of required columns
         columns_to_keep = [col for pair in self.column_pairs for col in pair]
 
@@ -63,8 +123,12 @@ class DataFilter:
             self.log_manager.log_warning(f"The following required columns are missing from the DataFrame: {missing_columns}")
             columns_to_keep = [col for col in columns_to_keep if col in self.df.columns]
 
-        # Filter the DataFrame
-        filtered_df = self.df[columns_to_keep]
+        # Filter the DataFrame. If the loader already read only the required columns, the DataFrame
+        # is kept as it is (selecting them again would copy all data just to reorder the columns)
+        if set(columns_to_keep) == set(self.df.columns):
+            filtered_df = self.df
+        else:
+            filtered_df = self.df[columns_to_keep]
         if self.log_manager:
             self.log_manager.log_info(f"Filtered DataFrame to include {len(columns_to_keep)} columns.")
         if self.metadata_manager:
@@ -79,46 +143,37 @@ class DataFilter:
         return self.df
     
     # !!! 2. USED !!!
-    def synchronize_time(self) -> None:
+    def synchronize_time(self, reference_column: str = None,
+                         reference_hz: float = None,
+                         policies: Dict[str, str] = None,
+                         default_policy: str = 'nearest') -> pd.DataFrame:
         """
-        Synchronizes time for all sensors in the DataFrame.
-        dose not work consider fast sensors
+        Synchronizes time for all sensors in the DataFrame onto one reference grid (see TimeSynchronizer).
+
+        Parameters:
+        - reference_column: Data column whose time column is the reference grid (default: the first sensor).
+        - reference_hz: If set, use a fixed-rate grid with this frequency instead of the reference timestamps.
+        - policies: {data column: 'nearest' | 'last' | 'mean' | 'auto'} per sensor.
+                    'mean' aggregates fast sensors over the grid bin instead of decimating them.
+        - default_policy: Policy for the sensors not listed in policies.
 
         Returns:
         - pd.DataFrame: A DataFrame with synchronized time columns.
         """
         sensors = [pair for pair in self.column_pairs]
-        # Use the time column of the first sensor as the reference time
+        # Use the time column of the first sensor (or of reference_column) as the reference time
         reference_time_col = sensors[0][0]
+        if reference_column is not None:
+            reference_time_col = next((pair[0] for pair in sensors if pair[-1] == reference_column), None)
 
         if reference_time_col not in self.df.columns:
             if self.log_manager:
                 self.log_manager.log_error(f"Reference time column '{reference_time_col}' is missing from the DataFrame.")
             return self.df
 
-        # Create a reference time index
-        reference_time = self.df[reference_time_col].dropna().astype(float).sort_values().unique()
-        final_df = pd.DataFrame(index=reference_time)
-        final_df.index.name = 'Time'
-
-        # Calculate average sampling interval for tolerance
-        delta_times = np.diff(reference_time)
-        average_delta_time = np.mean(delta_times)
-        tolerance = average_delta_time / 2
-
-        # Process slow sensors
-        for time_col, data_col in sensors:
-            if time_col in self.df.columns and data_col in self.df.columns:
-                df_sensor = self.df[[time_col, data_col]].dropna()
-                df_sensor[time_col] = df_sensor[time_col].astype(float)
-                df_sensor.set_index(time_col, inplace=True)
-                df_sensor = df_sensor[~df_sensor.index.duplicated(keep='first')]
-                # Reindex onto reference time using 'nearest' method
-                df_sensor = df_sensor.reindex(final_df.index, method='nearest', tolerance=tolerance)
-                final_df[data_col] = df_sensor[data_col]
-            else:
-                if self.log_manager:
-                    self.log_manager.log_warning(f"Columns '{time_col}' and/or '{data_col}' not found in DataFrame.")
+        synchronizer = TimeSynchronizer(df=self.df, sensors=sensors, log_manager=self.log_manager)
+        reference_time = synchronizer.build_grid(reference_time_col, reference_hz=reference_hz)
+        final_df = synchronizer.synchronize(reference_time, policies=policies, default_policy=default_policy)
 
         # Reset index to make 'Time' a column
         final_df.reset_index(inplace=True)
@@ -147,45 +202,58 @@ class DataFilter:
     # !!! 3. USED !!! 
     def filter_all_stable_periods(self) -> pd.DataFrame:
         """
-        Intersects the time arrays from multiple stable identification functions,
+        Intersects the stable [start, end] intervals of all detectors (self.detectors),
         extracts corresponding data from the DataFrame.
 
         Returns:
         - pd.DataFrame with the extracted data.
         """
-        stable_functions = [
-            self._identify_stable_rotation,
-            self._identify_stable_torque_nm,
-            self._identify_stable_fuel_consumption,
-            self._filter_high_temperature_oil
-            # Add more functions if needed
-        ]
-
-        # Collect all stable time sets
-        stable_time_sets = []
-        for func in stable_functions:
-            stable_time_arrays = func()
-            if not stable_time_arrays:
+        detector_functions = {
+            'stable': self._identify_stable_levels,
+            'min_value': self._filter_min_value,
+        }
+
+        # Intersect the sorted intervals of all detectors
+        intersected_intervals = None
+        # Rows kept by the min_value detectors alone (kept in self.df even if the intersection is empty)
+        min_value_intervals = None
+        for detector in self.detectors:
+            parameters = {key: value for key, value in detector.items() if key not in ('type', 'threshold', 'window')}
+            stable_intervals = detector_functions[detector['type']](**parameters)
+            if self.log_manager:
+                durations = pd.to_timedelta(stable_intervals[:, 1] - stable_intervals[:, 0])
+                self.log_manager.log_event('stable_detector', detector=detector['name'], intervals=len(stable_intervals),
+                                           stable_s=float(np.sum(durations.total_seconds())))
+            if len(stable_intervals) == 0:
                 if self.log_manager:
-                    self.log_manager.log_warning(f"No stable periods identified by {func.__name__}.")
+                    self.log_manager.log_warning(f"No stable periods identified by detector '{detector['name']}'.")
                 return pd.DataFrame()
-            # Combine all time arrays from this function into a set
-            times = set(np.concatenate(stable_time_arrays))
-            stable_time_sets.append(times)
-
-        
-        # Find the intersection of all stable times
-        intersected_times = set.intersection(*stable_time_sets)
+            if intersected_intervals is None:
+                intersected_intervals = stable_intervals
+            else:
+                intersected_intervals = intersect_intervals(intersected_intervals, stable_intervals)
+            if detector['type'] == 'min_value':
+                min_value_intervals = stable_intervals if min_value_intervals is None \
+                    else intersect_intervals(min_value_intervals, stable_intervals)
 
-        if not intersected_times:
+        if len(intersected_intervals) == 0:
             if self.log_manager:
                 self.log_manager.log_warning("No overlapping stable periods found among all metrics.")
+            if min_value_intervals is not None:
+                # Like the former oil temperature filter, which replaced self.df, the rows below
+                # the min_value thresholds are still removed
+                self.df = self.df.take(np.flatnonzero(intervals_mask(self.df['Time'].to_numpy(), min_value_intervals)))
             return pd.DataFrame()
 
-        extracted_df = self.df[self.df['Time'].isin(intersected_times)].copy()
+        self.stable_intervals = intersected_intervals
+        # take() builds the new frame directly from the row positions (no intermediate copy)
+        extracted_df = self.df.take(np.flatnonzero(intervals_mask(self.df['Time'].to_numpy(), intersected_intervals)))
 
         if self.log_manager:
-            self.log_manager.log_info(f"For ALL filters extracted {len(extracted_df)} rows of intersected stable data.")
+            self.log_manager.log_info(f"For ALL filters extracted {len(extracted_df)} rows of intersected stable data "
+                                      f"in {len(intersected_intervals)} intervals.")
+            self.log_manager.log_event('stable_filter', rows_in=len(self.df), rows_out=len(extracted_df),
+                                       intervals=len(intersected_intervals))
 
         if self.metadata_manager:
             self.metadata_manager.update_metadata(
@@ -252,383 +320,140 @@ class DataFilter:
             self.log_manager.log_info(f"Renaming column '{fuel_col_name}' to 'Zużycie paliwa średnie[g/s]'.")
         self.df.rename(columns={fuel_col_name: "Zużycie paliwa średnie[g/s]"}, inplace=True)
 
-    def _identify_stable_rotation(self, threshold: int = 20, window: str = '8000ms') -> List[np.ndarray]:
+    def _get_stable_runs(self) -> Dict[str, Dict[str, np.ndarray]]:
         """
-        Identifies stable rotation levels in 'Obroty[obr/min]'.
-        A rotation level is considered stable if its value changes by ≤ threshold over the specified window.
-
-        Returns:
-        - List of time arrays corresponding to each stable rotation level.
+        Runs the StableWindowEngine once for all stable rules and caches the result,
+        so the stable detectors share one pass over the data.
         """
-        if self.log_manager:
-            self.log_manager.log_info(f"Starting identify_stable_rotation with threshold={threshold} and window='{window}'")
-        
-        # Check if 'Obroty[obr/min]' column exists
-        if 'Obroty[obr/min]' not in self.df.columns:
-            if self.log_manager:
-                self.log_manager.log_error("Column 'Obroty[obr/min]' not found in DataFrame.")
-            return []
-
-        df = self.df.copy()
-        if self.log_manager:
-            self.log_manager.log_info("DataFrame copied for processing.")
-
-        # Check if 'Time' column exists
-        if 'Time' not in df.columns:
-            if self.log_manager:
-                self.log_manager.log_error("Column 'Time' not found in DataFrame.")
-            return []
-
-        # Ensure 'Time' is in datetime format and set as index
-        if not pd.api.types.is_datetime64_any_dtype(df['Time']):
-            df['Time'] = pd.to_datetime(df['Time'], unit='ms')
-            if self.log_manager:
-                self.log_manager.log_info("Converted 'Time' column to datetime.")
-        else:
-            if self.log_manager:
-                self.log_manager.log_info("'Time' column is already in datetime format.")
-
-        df.set_index('Time', inplace=True)
-        if self.log_manager:
-            self.log_manager.log_info("'Time' column set as index.")
-
-        # Compute rolling max and min over the specified window
-        if self.log_manager:
-            self.log_manager.log_info("Computing rolling max and min of 'Obroty[obr/min]'.")
-        rolling_object = df['Obroty[obr/min]'].rolling(window, min_periods=1)
-        roll_max = rolling_object.max()
-        roll_min = rolling_object.min()
-        roll_diff = roll_max - roll_min
-
-        # Identify stable rotation where difference ≤ threshold
-        stable_mask = roll_diff <= threshold
-        if self.log_manager:
-            num_stable_points = stable_mask.sum()
-            self.log_manager.log_info(f"Identified {num_stable_points} points where rotation difference ≤ threshold.")
-
-        # Label contiguous stable regions
-        df['Stable'] = stable_mask
-        df['Group'] = (df['Stable'] != df['Stable'].shift()).cumsum()
-        if self.log_manager:
-            num_groups = df['Group'].nunique()
-            self.log_manager.log_info(f"Labeled stable regions into {num_groups} groups.")
-
-        # Extract time arrays for each stable region
-        stable_time_arrays = []
-        for group_id, group in df[df['Stable']].groupby('Group'):
-            times = group.index.values
-            stable_time_arrays.append(times)
-            if self.log_manager:
-                self.log_manager.log_info(f"Group {group_id}: Found {len(times)} stable time points.")
-
-        # Clean up
-        df.drop(columns=['Stable', 'Group'], inplace=True)
-        if self.log_manager:
-            self.log_manager.log_info("Dropped temporary 'Stable' and 'Group' columns.")
-
-        # Logging
-        if self.log_manager:
-            self.log_manager.log_info(f"Identified {len(stable_time_arrays)} stable rotation levels.")
-
-        # Calculate average rotation values for each stable rotation period
-        rpm_mean_values = []
-        for idx, time_array in enumerate(stable_time_arrays):
-            extracted_df = self.df[self.df['Time'].isin(time_array)].copy()
-            rpm_mean_value = round(extracted_df['Obroty[obr/min]'].mean(), 1)
-            rpm_mean_values.append(rpm_mean_value)
-            if self.log_manager:
-                self.log_manager.log_info(f"Group {idx}: Mean rotation = {rpm_mean_value} RPM.")
-
-        if self.log_manager:
-            self.log_manager.log_info(f"Stable rotation levels extracted. Average values: {rpm_mean_values}")
-
-        # Metadata management
-        if self.metadata_manager:
-            self.metadata_manager.update_metadata(
-                self.step_5_file_name,
-                'Identified stable rotation levels:',
-                len(stable_time_arrays)
-            )
-            self.metadata_manager.update_metadata(
-                self.step_5_file_name,
-                'Stable rotation levels extracted. Average values:',
-                rpm_mean_values
+        if self._stable_runs is None or self._stable_runs_df is not self.df:
+            self._stable_runs_df = self.df
+            engine = StableWindowEngine(
+                df=self.df,
+                rules=self.stable_rules,
+                log_manager=self.log_manager
             )
+            self._stable_runs = engine.run()
+        return self._stable_runs
 
-        return stable_time_arrays
-
-    def _identify_stable_torque_nm(self, threshold: float = 1.6, window: str = '8000ms') -> List[np.ndarray]:
+    def _identify_stable_levels(self, column: str, name: str, unit: str, decimals: int,
+                                metadata_label: str = None) -> np.ndarray:
         """
-        Identifies stable torque levels in 'Moment obrotowy[Nm]'.
-        A torque level is considered stable if its value changes by ≤ threshold over the specified window.
+        Identifies stable levels of a column using the shared StableWindowEngine results.
+        A level is considered stable if its value changes by ≤ threshold over the rule window.
+
+        Parameters:
+        - column: Column to check, must be a key of self.stable_rules.
+        - name: Name of the detector for logs and metadata (e.g. 'rotation').
+        - unit: Unit used in the logs.
+        - decimals: Rounding of the mean values.
+        - metadata_label: Label in the 'Identified stable ...' metadata key (default: '<name> levels').
 
         Returns:
-        - List of time arrays corresponding to each stable torque level.
+        - Sorted [start, end] time intervals (shape (k, 2)), one per stable level.
         """
+        threshold, window = self.stable_rules[column]
         if self.log_manager:
-            self.log_manager.log_info(f"!!!---> Starting identify_stable_torque_nm with threshold={threshold} and window='{window}'")
-        
-        # Check if 'Moment obrotowy[Nm]' column exists
-        if 'Moment obrotowy[Nm]' not in self.df.columns:
-            if self.log_manager:
-                self.log_manager.log_error("Column 'Moment obrotowy[Nm]' not found in DataFrame.")
-            return []
+            self.log_manager.log_info(f"Starting identify_stable_{name.replace(' ', '_')} "
+                                      f"with threshold={threshold} and window='{window}'")
 
-        df = self.df.copy()
-        if self.log_manager:
-            self.log_manager.log_info("DataFrame copied for processing.")
-        
-        # Check if 'Time' column exists
-        if 'Time' not in df.columns:
+        if column not in self.df.columns:
             if self.log_manager:
-                self.log_manager.log_error("Column 'Time' not found in DataFrame.")
-            return []
-
-        # Ensure 'Time' is in datetime format and set as index
-        if not pd.api.types.is_datetime64_any_dtype(df['Time']):
-            df['Time'] = pd.to_datetime(df['Time'], unit='ms')
-            if self.log_manager:
-                self.log_manager.log_info("Converted 'Time' column to datetime.")
-        else:
+                self.log_manager.log_error(f"Column '{column}' not found in DataFrame.")
+            return np.empty((0, 2))
+        if 'Time' not in self.df.columns:
             if self.log_manager:
-                self.log_manager.log_info("'Time' column is already in datetime format.")
-        
-        df.set_index('Time', inplace=True)
-        if self.log_manager:
-            self.log_manager.log_info("'Time' column set as index.")
-
-        # Compute rolling max and min over the specified window
-        if self.log_manager:
-            self.log_manager.log_info("Computing rolling max and min of 'Moment obrotowy[Nm]'.")
-        rolling_object = df['Moment obrotowy[Nm]'].rolling(window, min_periods=1)
-        roll_max = rolling_object.max()
-        roll_min = rolling_object.min()
-        roll_diff = roll_max - roll_min
-        if self.log_manager:
-            #  Log main parameters of the rolling object
-            self.log_manager.log_info("Rolling object parameters:")
-            self.log_manager.log_info(f" - window: {rolling_object.window}")
-            self.log_manager.log_info(f" - min_periods: {rolling_object.min_periods}")
-            self.log_manager.log_info(f" - center: {rolling_object.center}")
-            self.log_manager.log_info(f" - win_type: {rolling_object.win_type}")
-            self.log_manager.log_info(f" - axis: {rolling_object.axis}")
-            self.log_manager.log_info(f" - method: {rolling_object.method}")
-            self.log_manager.log_info(f" - closed: {rolling_object.closed}")
-
-        # Identify stable torque where difference ≤ threshold
-        stable_mask = roll_diff <= threshold
-        if self.log_manager:
-            num_stable_points = stable_mask.sum()
-            self.log_manager.log_info(f"Identified {num_stable_points} points where torque difference ≤ threshold.")
+                self.log_manager.log_error("Column 'Time' not found in DataFrame.")
+            return np.empty((0, 2))
 
-        # Label contiguous stable regions
-        df['Stable'] = stable_mask
-        df['Group'] = (df['Stable'] != df['Stable'].shift()).cumsum()
+        runs = self._get_stable_runs()[column]
         if self.log_manager:
-            num_groups = df['Group'].nunique()
-            self.log_manager.log_info(f"Labeled stable regions into {num_groups} groups.")
-
-        # Extract time arrays for each stable region
-        stable_time_arrays = []
-        for group_id, group in df[df['Stable']].groupby('Group'):
-            times = group.index.values
-            stable_time_arrays.append(times)
-            if self.log_manager:
-                self.log_manager.log_info(f"Group {group_id}: Found {len(times)} stable time points.")
+            self.log_manager.log_info(f"Identified {runs['stable_points']} points where {name} difference ≤ threshold.")
 
-        # Clean up
-        df.drop(columns=['Stable', 'Group'], inplace=True)
+        # [start, end] time interval for each stable region
+        stable_intervals = np.column_stack((runs['start_time'], runs['end_time']))
         if self.log_manager:
-            self.log_manager.log_info("Dropped temporary 'Stable' and 'Group' columns.")
+            self.log_manager.log_debug(lambda: "\n".join(
+                f"Group {group_id}: Found {count} stable time points." for group_id, count in enumerate(runs['count'])
+            ))
+            self.log_manager.log_info(f"Identified {len(stable_intervals)} stable {name} levels.")
 
-        # Logging
+        # Average values for each stable period, rounded as np.float64 like the per-period pandas means
+        # (round() of the Python float gives e.g. 299.9 instead of 300.0 for 299.95)
+        mean_values = [float(round(np.float64(mean_value), decimals)) for mean_value in runs['mean']]
         if self.log_manager:
-            self.log_manager.log_info(f"Identified {len(stable_time_arrays)} stable torque levels.")
-
-        # Calculate average torque values for each stable torque period
-        torque_mean_values = []
-
-        for idx, time_array in enumerate(stable_time_arrays):
-            extracted_df = self.df[self.df['Time'].isin(time_array)].copy()
-            torque_mean_value = round(extracted_df['Moment obrotowy[Nm]'].mean(), 1)
-            torque_mean_values.append(torque_mean_value)
-            if self.log_manager:
-                self.log_manager.log_info(f"Group {idx}: Mean torque = {torque_mean_value} Nm.")
-
-        # Clean the chunks using the new method
-        #self._clean_stable_chunks(stable_time_arrays)
-
-        if self.log_manager:
-            self.log_manager.log_info(f"Stable torque levels extracted. Average values: {torque_mean_values}")
+            self.log_manager.log_debug(lambda: "\n".join(
+                f"Group {group_id}: Mean {name} = {mean_value} {unit}." for group_id, mean_value in enumerate(mean_values)
+            ))
+            self.log_manager.log_info(f"Stable {name} levels extracted. Average values: {mean_values}")
 
         # Metadata management
         if self.metadata_manager:
             self.metadata_manager.update_metadata(
                 self.step_5_file_name,
-                'Identified stable torque levels (Moment obrotowy[Nm]):',
-                len(stable_time_arrays)
+                f'Identified stable {metadata_label or name + " levels"}:',
+                len(stable_intervals)
             )
             self.metadata_manager.update_metadata(
                 self.step_5_file_name,
-                'Stable torque levels extracted. Average values:',
-                torque_mean_values
+                f'Stable {name} levels extracted. Average values:',
+                mean_values
             )
 
-        return stable_time_arrays
+        return stable_intervals
 
-    def _identify_stable_fuel_consumption(self, threshold: float = 0.1, window: str = '8000ms') -> List[np.ndarray]:
+    def _filter_min_value(self, column: str, name: str, min_value: float, unit: str = '') -> np.ndarray:
         """
-        Identify stable fuel consumption levels in the column 'Zużycie paliwa średnie[g/s]'.
-        A fuel consumption level is considered stable if its value changes by ≤ threshold over a specified window.
-        Returns a list of time arrays (from the "Time" index) corresponding to each stable fuel consumption level.
-        """
-        if self.log_manager:
-            self.log_manager.log_info(f"Starting identify_stable_fuel_consumption with threshold={threshold} and window='{window}'")
-        
-        # Check if 'Zużycie paliwa średnie[g/s]' column exists
-        if 'Zużycie paliwa średnie[g/s]' not in self.df.columns:
-            if self.log_manager:
-                self.log_manager.log_error("Column 'Zużycie paliwa średnie[g/s]' not found in DataFrame.")
-            return []
-        
-        df = self.df.copy()
-        if self.log_manager:
-            self.log_manager.log_info("DataFrame copied for processing.")
-        
-        # Check if 'Time' column exists
-        if 'Time' not in df.columns:
-            if self.log_manager:
-                self.log_manager.log_error("Column 'Time' not found in DataFrame.")
-            return []
-        
-        # Ensure 'Time' is in datetime format and set as index
-        if not pd.api.types.is_datetime64_any_dtype(df['Time']):
-            df['Time'] = pd.to_datetime(df['Time'], unit='ms')
-            if self.log_manager:
-                self.log_manager.log_info("Converted 'Time' column to datetime.")
-        else:
-            if self.log_manager:
-                self.log_manager.log_info("'Time' column is already in datetime format.")
-        
-        df.set_index('Time', inplace=True)
-        if self.log_manager:
-            self.log_manager.log_info("'Time' column set as index.")
-    
-        # Compute rolling max and min over the specified window
-        if self.log_manager:
-            self.log_manager.log_info("Computing rolling max and min of 'Zużycie paliwa średnie[g/s]'.")
-        rolling_object = df['Zużycie paliwa średnie[g/s]'].rolling(window, min_periods=1)
-        roll_max = rolling_object.max()
-        roll_min = rolling_object.min()
-        roll_diff = roll_max - roll_min
-        if self.log_manager:
-            # Log main parameters of the rolling object
-            self.log_manager.log_info("Rolling object parameters:")
-            self.log_manager.log_info(f" - window: {rolling_object.window}")
-            self.log_manager.log_info(f" - min_periods: {rolling_object.min_periods}")
-            self.log_manager.log_info(f" - center: {rolling_object.center}")
-            self.log_manager.log_info(f" - axis: {rolling_object.axis}")
-            self.log_manager.log_info(f" - method: {rolling_object.method}")
-            self.log_manager.log_info(f" - closed: {rolling_object.closed}")
-    
-        # Identify stable fuel consumption where difference ≤ threshold
-        stable_mask = roll_diff <= threshold
-        if self.log_manager:
-            num_stable_points = stable_mask.sum()
-            self.log_manager.log_info(f"Identified {num_stable_points} points where fuel consumption difference ≤ threshold.")
-    
-        # Label contiguous stable regions
-        df['Stable'] = stable_mask
-        df['Group'] = (df['Stable'] != df['Stable'].shift()).cumsum()
-        if self.log_manager:
-            num_groups = df['Group'].nunique()
-            self.log_manager.log_info(f"Labeled stable regions into {num_groups} groups.")
-    
-        # Extract time arrays for each stable region
-        stable_time_arrays = []
-        for group_id, group in df[df['Stable']].groupby('Group'):
-            times = group.index.values
-            stable_time_arrays.append(times)
-            if self.log_manager:
-                self.log_manager.log_info(f"Group {group_id}: Found {len(times)} stable time points.")
-    
-        # Clean up
-        df.drop(columns=['Stable', 'Group'], inplace=True)
-        if self.log_manager:
-            self.log_manager.log_info("Dropped temporary 'Stable' and 'Group' columns.")
-    
-        # Logging
-        if self.log_manager:
-            self.log_manager.log_info(f"Identified {len(stable_time_arrays)} stable fuel consumption levels.")
-    
-        # Calculate average fuel consumption values for each stable period
-        fuel_mean_values = []
-        for idx, time_array in enumerate(stable_time_arrays):
-            extracted_df = self.df[self.df['Time'].isin(time_array)].copy()
-            fuel_mean_value = round(extracted_df['Zużycie paliwa średnie[g/s]'].mean(), 2)
-            fuel_mean_values.append(fuel_mean_value)
-            if self.log_manager:
-                self.log_manager.log_info(f"Group {idx}: Mean fuel consumption = {fuel_mean_value} g/s.")
-    
-        if self.log_manager:
-            self.log_manager.log_info(f"Stable fuel consumption levels extracted. Average values: {fuel_mean_values}")
-        
-        # Metadata management
-        if self.metadata_manager:
-            self.metadata_manager.update_metadata(
-                self.step_5_file_name, 'Identified stable fuel consumption levels:', len(stable_time_arrays)
-            )
-            self.metadata_manager.update_metadata(
-                self.step_5_file_name, 'Stable fuel consumption levels extracted. Average values:', fuel_mean_values
-            )
-    
-        return stable_time_arrays
-    
-    def _filter_high_temperature_oil(self) -> List[np.ndarray]:
-        """
-        Removes rows where 'Temp. oleju w misce[°C]' is less than 50.
+        Keeps the rows where the column is ≥ min_value (e.g. 'Temp. oleju w misce[°C]' ≥ 50).
+        If no row reaches min_value the sensor is assumed faulty and the whole recording is kept.
+
+        Parameters:
+        - column: Column to check.
+        - name: Name of the detector for logs and metadata (e.g. 'high temperature oil').
+        - min_value: Minimum value.
+        - unit: Unit used in the logs.
+
         Returns:
-        - high_temperature_oil_time_array: List of time arrays where oil temperature is ≥ 50°C.
+        - Sorted [start, end] time intervals where the column is ≥ min_value.
         """
+        function_name = f"filter_{name.replace(' ', '_')}"
         if self.log_manager:
-            self.log_manager.log_info("Starting filter_high_temperature_oil.")
+            self.log_manager.log_info(f"Starting {function_name}.")
         
-        # Check if 'Temp. oleju w misce[°C]' column exists
-        if 'Temp. oleju w misce[°C]' not in self.df.columns:
+        # Check if the column exists
+        if column not in self.df.columns:
             if self.log_manager:
-                self.log_manager.log_error("Column 'Temp. oleju w misce[°C]' not found in DataFrame.")
-            return []
+                self.log_manager.log_error(f"Column '{column}' not found in DataFrame.")
+            return np.empty((0, 2))
         
-        # Filter the DataFrame to include only rows where temperature ≥ 50°C
-        high_temp_df = self.df[self.df['Temp. oleju w misce[°C]'] >= 50].copy()
+        # Rows where value ≥ min_value (the rows are only marked, the DataFrame is not copied)
+        min_value_mask = (self.df[column] >= min_value).to_numpy()
+        min_value_rows = int(min_value_mask.sum())
+        time_values = self.df['Time'].to_numpy()
         
-        # Check whether oil temperature sensor is working properly
-        if len(high_temp_df) == 0:
-            temperature_oil_time_array_unchanged = [self.df['Time'].values]
+        # Check whether the sensor is working properly
+        if min_value_rows == 0:
+            intervals_unchanged = np.array([[time_values[0], time_values[-1]]])
             if self.log_manager:
-                self.log_manager.log_warning("No rows found where oil temperature was ≥ 50°C.")
-                self.log_manager.log_info("'def _filter_high_temperature_oil()' was not used. The DataFrame was not changed.")
-            return temperature_oil_time_array_unchanged        
+                self.log_manager.log_warning(f"No rows found where '{column}' was ≥ {min_value}{unit}.")
+                self.log_manager.log_info(f"'def _{function_name}()' was not used. The DataFrame was not changed.")
+            return intervals_unchanged
 
-        num_removed = len(self.df) - len(high_temp_df)
+        num_removed = len(self.df) - min_value_rows
         if self.log_manager:
-            self.log_manager.log_info(f"Removed {num_removed} rows where oil temperature was less than 50°C.")
+            self.log_manager.log_info(f"Removed {num_removed} rows where '{column}' was less than {min_value}{unit}.")
         
-        # Get the time array where oil temperature is high
-        high_temperature_oil_time_array = [high_temp_df['Time'].values]
+        # Get the time intervals where the value is high enough
+        min_value_intervals = mask_to_intervals(time_values, min_value_mask)
         
         # Update metadata
         if self.metadata_manager:
             self.metadata_manager.update_metadata(
                 self.step_5_file_name,
-                'Filtered data shape after "filter_high_temperature_oil":',
-                high_temp_df.shape
+                f'Filtered data shape after "{function_name}":',
+                (min_value_rows, self.df.shape[1])
             )
         
-        # Update self.df with the filtered DataFrame
-        self.df = high_temp_df
-        
-        return high_temperature_oil_time_array
+        return min_value_intervals
 
     def _clean_dataframe(self) -> None:
         """
@@ -638,7 +463,8 @@ class DataFilter:
             df=self.df,
             names_of_files_under_procession=self.names_of_files_under_procession,
             metadata_manager=self.metadata_manager,
-            log_manager=self.log_manager
+            log_manager=self.log_manager,
+            copy=False
         )
         cleaned_df = data_cleaner.clean()
         self.df = cleaned_df
@@ -1,14 +1,16 @@
 import os
 import pandas as pd
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import json
-from typing import List, Union
-from src.config import RAW_DATA_DIR
+from typing import List, Optional, Union
+from src.config import RAW_DATA_DIR, COLUMN_NAMES_FIXED_METADATA_KEY
 from src.metadata_manager import MetadataManager
 from src.log_manager import LogManager
 from ftfy import fix_text, fix_encoding
 import chardet
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # Set up logging
 # logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -67,12 +69,13 @@ class DataLoader:
         return files
     
     # !!!! used in main.py !!!!
-    def select_from_json_and_load_data(self, selected_id: int) -> List[pd.DataFrame]:
+    def select_from_json_and_load_data(self, selected_id: int, columns: List[str] = None) -> List[pd.DataFrame]:
         """
         Select data files to load based on 'self.json_path.json' and a provided 'id'.
 
         Parameters:
         - selected_id: The ID of the data entry to load.
+        - columns: Required data columns of the main file (None = read all columns).
 
         Returns:
         - List of DataFrames loaded from the selected files.
@@ -113,7 +116,7 @@ class DataLoader:
         if main_file_name:
             if self.log_manager:
                 self.log_manager.log_info(f"Loading main file: {main_file_name}")
-            df_main = self.load_data(main_file_name)
+            df_main = self.load_data(main_file_name, columns=columns)
             if df_main is not None:
                 data_frames.append(df_main)
             else:
@@ -139,12 +142,14 @@ class DataLoader:
 
 
     # !!!! used in def select_from_json_and_load_data(self, selected_id: int)  !!!!
-    def load_data(self, file_name: str) -> Union[pd.DataFrame, None]:
+    def load_data(self, file_name: str, columns: List[str] = None) -> Union[pd.DataFrame, None]:
         """
         Load data from a specified file.
 
         Parameters:
         - file_name: Name of the file to load data from.
+        - columns: Required data columns. For parquet files only these columns and their paired
+                   time columns ('Czas [ms].N') are read. None reads all columns.
 
         Returns:
         - DataFrame containing the loaded data, or None if the file format is unsupported.
@@ -165,8 +170,10 @@ class DataLoader:
         elif file_name.endswith('.xlsx'):
             data = pd.read_excel(file_path)
         elif file_name.endswith('.parquet'):
-            data = pd.read_parquet(file_path)
-            data.columns = [fix_encoding(col) for col in data.columns]
+            columns_to_read = self._resolve_parquet_columns(file_path, columns) if columns else None
+            data = pd.read_parquet(file_path, columns=columns_to_read)
+            if not self._has_fixed_column_names(file_path):
+                data.columns = [fix_encoding(col) for col in data.columns]
         else:
             if self.log_manager:
                 self.log_manager.log_error(f"Unsupported file format: {file_name}")
@@ -175,7 +182,7 @@ class DataLoader:
         if self.log_manager:
             self.log_manager.log_info(f"Data loaded successfully from file: {file_path}")
             self.log_manager.log_info(f"Data Frame Shape: {data.shape}")
-            self.log_manager.log_info(f"Data Frame Columns: {list(data.columns)}")
+            self.log_manager.log_debug(lambda: f"Data Frame Columns: {list(data.columns)}")
             #self.log_manager.log_dataframe_in_chunks(data, file_name)
 
         #self.metadata_manager.update_metadata(f"{file_name}", f'{file_name}_columns', list(data.columns))
@@ -184,11 +191,69 @@ class DataLoader:
 
         return data
 
-    
-    def load_all_data(self) -> List[pd.DataFrame]:
+
+    def _resolve_parquet_columns(self, file_path: str, columns: List[str], pair_time_columns: bool = True) -> List[str]:
+        """
+        Find the raw parquet column names to read for the required columns, using the schema only.
+        Every data column is preceded by its time column, so the column before it is read as well
+        (the same pairing as in DataFilter.filter_columns).
+
+        Parameters:
+        - file_path: Path to the parquet file.
+        - columns: Required data columns (names after fix_encoding).
+        - pair_time_columns: If False, only the required columns are read (e.g. for processed files).
+
+        Returns:
+        - List of raw column names in schema order.
+        """
+        schema = pq.read_schema(file_path)
+        schema_names = schema.names
+        if self._has_fixed_column_names(file_path, schema):
+            fixed_names = schema_names
+        else:
+            fixed_names = [fix_encoding(name) for name in schema_names]
+        positions = {name: idx for idx, name in reversed(list(enumerate(fixed_names)))}
+
+        indices = set()
+        for col_name in columns:
+            idx = positions.get(col_name)
+            if idx is None:
+                if self.log_manager:
+                    self.log_manager.log_warning(f"Column '{col_name}' not found in parquet schema of '{file_path}'.")
+                continue
+            indices.add(idx)
+            if pair_time_columns and idx > 0:
+                indices.add(idx - 1)
+
+        columns_to_read = [schema_names[idx] for idx in sorted(indices)]
+        if self.log_manager:
+            self.log_manager.log_info(f"Reading {len(columns_to_read)} of {len(schema_names)} columns from '{file_path}'.")
+        return columns_to_read
+
+    @staticmethod
+    def _has_fixed_column_names(file_path: str, schema=None) -> bool:
+        """
+        True if the parquet file was written by the ingest stage with the column names already fixed.
+
+        Parameters:
+        - file_path: Path to the parquet file.
+        - schema: Already read pyarrow schema of the file (read from the file if None).
+
+        Returns:
+        - True if fix_encoding does not need to be applied to the column names.
+        """
+        if schema is None:
+            schema = pq.read_schema(file_path)
+        metadata = schema.metadata or {}
+        return metadata.get(COLUMN_NAMES_FIXED_METADATA_KEY.encode()) == b'true'
+
+    def load_all_data(self, num_workers: int = 4) -> List[pd.DataFrame]:
         """
         Load all supported files from the raw data directory.
 
+        Parameters:
+        - num_workers: Number of files read concurrently.
+
         Returns:
         - List of DataFrames, one for each successfully loaded file.
         """
@@ -198,18 +263,8 @@ class DataLoader:
                 self.log_manager.log_error(f"No data files found in directory '{self.raw_data_path}'.")
             raise FileNotFoundError(f"No data files found in directory '{self.raw_data_path}'.")
 
-        data_frames = []
-        for file in files:
-            try:
-                df = self.load_data(file)
-                data_frames.append(df)
-                if self.log_manager:
-                    self.log_manager.log_info(f"Successfully loaded: {file}")
-            except Exception as e:
-                if self.log_manager:
-                    self.log_manager.log_error(f"Failed to load '{file}': {e}")
-        
-        return data_frames
+        data_frames = self.parallel_load_files(files, num_workers=num_workers)
+        return [df for df in data_frames if df is not None]
 
     def save_to_parquet(self, data: pd.DataFrame, save_path: str):
         """
@@ -243,21 +298,66 @@ class DataLoader:
             "size_in_memory": data.memory_usage(deep=True).sum(),
         }
     
-    def parallel_load_files(self, file_names: List[str], num_workers: int = 4) -> List[pd.DataFrame]:
+    def parallel_load_files(self, file_names: List[str], num_workers: int = 4,
+                            columns: List[str] = None,
+                            pair_time_columns: bool = False,
+                            as_arrow: bool = False) -> List[Optional[Union[pd.DataFrame, pa.Table]]]:
         """
-        Load multiple files in parallel using multiprocessing.
+        Load multiple files concurrently with a thread pool (pyarrow releases the GIL while reading,
+        so the files are read in parallel without pickling the data between processes).
 
         Parameters:
-        - file_names: List of file names to load.
-        - num_workers: Number of parallel processes.
+        - file_names: List of file names (relative to raw_data_path, or absolute paths).
+        - num_workers: Number of files read concurrently.
+        - columns: Columns to read from the parquet files (names after fix_encoding). None reads all columns.
+        - pair_time_columns: Also read the time column preceding every requested column (raw bench files).
+        - as_arrow: Return pyarrow Tables instead of DataFrames.
 
         Returns:
-        - List of DataFrames.
+        - List in the order of file_names; None for the files that failed to load (the error is logged).
         """
-        with Pool(num_workers) as pool:
-            data_frames = pool.map(self.load_file, file_names)
-        return data_frames
-    
+        def load(file_name: str):
+            try:
+                data = self._read_file(file_name, columns, pair_time_columns, as_arrow)
+                if self.log_manager:
+                    self.log_manager.log_info(f"Successfully loaded: {file_name} {data.shape}")
+                return data
+            except Exception as e:
+                if self.log_manager:
+                    self.log_manager.log_error(f"Failed to load '{file_name}': {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            return list(executor.map(load, file_names))
+
+    def _read_file(self, file_name: str, columns: List[str], pair_time_columns: bool,
+                   as_arrow: bool) -> Union[pd.DataFrame, pa.Table]:
+        """
+        Read one file for parallel_load_files (without metadata updates).
+        Parquet files are read with pyarrow; the DataFrame is converted without keeping a second copy.
+        """
+        file_path = os.path.join(self.raw_data_path, file_name)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File '{file_path}' does not exist.")
+
+        if not file_name.endswith('.parquet'):
+            if file_name.endswith('.csv'):
+                data = pd.read_csv(file_path, usecols=columns)
+            elif file_name.endswith('.xlsx'):
+                data = pd.read_excel(file_path, usecols=columns)
+            else:
+                raise ValueError(f"Unsupported file format: {file_name}")
+            return pa.Table.from_pandas(data, preserve_index=False) if as_arrow else data
+
+        schema = pq.read_schema(file_path)
+        columns_to_read = self._resolve_parquet_columns(file_path, columns, pair_time_columns) if columns else None
+        table = pq.read_table(file_path, columns=columns_to_read, memory_map=True)
+        if not self._has_fixed_column_names(file_path, schema):
+            table = table.rename_columns([fix_encoding(col) for col in table.column_names])
+        if as_arrow:
+            return table
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
     def validate_data(self, data: pd.DataFrame) -> bool:
         """
         Perform basic validation checks on a DataFrame.
@@ -5,6 +5,8 @@ from pandas.api.types import is_numeric_dtype, is_string_dtype
 from tabulate import tabulate
 from src.log_manager import LogManager
 from src.metadata_manager import MetadataManager
+from src.column_profile import column_profile
+from src.config import DIAGNOSTICS_LEVEL, APPROX_DISTINCT_MIN_ROWS
 
 # logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 # logger = logging.getLogger(__name__)
@@ -17,7 +19,8 @@ class DataValidator:
                  file_names: List[str] = [],
                  names_of_files_under_procession: List[str] = None,
                  log_manager: LogManager = None,
-                 metadata_manager: MetadataManager = None):
+                 metadata_manager: MetadataManager = None,
+                 diagnostics_level: str = DIAGNOSTICS_LEVEL):
         """
         Initialize the DataValidator.
 
@@ -28,7 +31,13 @@ class DataValidator:
         - file_names: List of file names for each DataFrame.
         - names_of_files_under_procession: List of file names under procession.
         - log_manager: An instance of LogManager for logging.
+        - metadata_manager: An instance of MetadataManager.
+        - diagnostics_level: Column profiles of get_metadata: 'off' (none), 'basic' (counts and dtypes)
+                             or 'full' (also distinct counts, approximate for large frames).
         """
+        if diagnostics_level not in ('off', 'basic', 'full'):
+            raise ValueError(f"Unknown diagnostics level '{diagnostics_level}', use 'off', 'basic' or 'full'.")
+        self.diagnostics_level = diagnostics_level
         self.dfs = dfs
         self.required_columns_list = required_columns_list
         self.names_of_files_under_procession = names_of_files_under_procession
@@ -112,13 +121,41 @@ class DataValidator:
             else:
                 self.log_manager.log_info(f"DataFrame {idx}: No duplicate columns found.")
 
+    def column_profile(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Column profile of a DataFrame at the diagnostics level.
+
+        Parameters:
+        - df: The DataFrame.
+
+        Returns:
+        - DataFrame with one row per column (see column_profile.column_profile).
+        """
+        distinct = None
+        if self.diagnostics_level == 'full':
+            distinct = 'approx' if len(df) > APPROX_DISTINCT_MIN_ROWS else 'exact'
+        return column_profile(df, distinct)
+
     # used in main_all_files.py te same method in data_manager.py
     def get_metadata(self, data_frames=None, message_for_logs=None) -> List[pd.DataFrame]:
+        """
+        Column profiles of the DataFrames. A one-line summary is logged at INFO, the full table only at DEBUG.
+
+        Parameters:
+        - data_frames: The DataFrames (default: the DataFrames of the validator).
+        - message_for_logs: Title of the logged profiles (e.g. the pipeline stage).
+
+        Returns:
+        - List of column profiles (empty if the diagnostics level is 'off').
+        """
         if data_frames is None:
             data_frames = self.dfs
         else:
             self.message_for_logs = message_for_logs
 
+        if self.diagnostics_level == 'off':
+            return []
+
         if self.log_manager:
             self.log_manager.log_info("Starting metadata extraction for multiple DataFrames...")
         metadata_list = []
@@ -127,18 +164,18 @@ class DataValidator:
             if self.log_manager:
                 self.log_manager.log_info(f"Processing DataFrame {idx + 1}/{len(data_frames)} with shape {df.shape}...")
 
-            metadata = pd.DataFrame({
-                "Column": df.columns,
-                "Total Values": df.count().values,
-                "Non-Null Count": df.notnull().sum().values,
-                "Null Count": df.isnull().sum().values,
-                "Unique Values": [df[col].nunique() for col in df.columns],
-                "Data Type": df.dtypes.values
-            })
+            metadata = self.column_profile(df)
             metadata_list.append(metadata)
             if self.log_manager:
                 self.log_manager.log_info(f"Metadata for DataFrame {idx}, names_of_files_under_procession:{self.names_of_files_under_procession},") 
-                self.log_manager.log_info(f"{message_for_logs}:\n{tabulate(metadata, headers='keys', tablefmt='grid')}")
+                self.log_manager.log_info(
+                    f"{message_for_logs} {df.shape[0]} rows, {df.shape[1]} columns, "
+                    f"{int(metadata['Null Count'].sum())} null values, "
+                    f"{int((metadata['Non-Null Count'] == 0).sum())} empty columns."
+                )
+                self.log_manager.log_debug(
+                    lambda metadata=metadata: f"{message_for_logs}:\n{tabulate(metadata, headers='keys', tablefmt='grid')}"
+                )
 
         if self.log_manager:
             self.log_manager.log_info("Metadata extraction completed for all DataFrames.")
@@ -1,50 +1,244 @@
 import os
+import json
+import queue
 import logging
+import logging.handlers
 from datetime import datetime
-from typing import List
+from typing import Callable, List, Union
 from tabulate import tabulate  # Add this import
+from src.config import LOGGING_LEVEL, LOG_DATAFRAME_MAX_COLUMNS, STRUCTURED_LOG_EVENTS
+
+# A message is a string or a callable that builds it (only called if the level is enabled)
+Message = Union[str, Callable[[], str]]
 
 class LogManager:
     def __init__(self, logs_dir: str, 
                  names_of_files_under_procession: List[str] = None, 
-                 metadata_manager=None):
+                 metadata_manager=None,
+                 asynchronous: bool = False,
+                 level: str = LOGGING_LEVEL,
+                 structured_events: bool = STRUCTURED_LOG_EVENTS):
+        """
+        Initialize the LogManager.
+
+        Parameters:
+        - logs_dir: Folder of the log files.
+        - names_of_files_under_procession: A list of file names under procession.
+        - metadata_manager: An instance of MetadataManager.
+        - asynchronous: Put the records on a queue; a background thread writes them
+                        (QueueHandler/QueueListener), so logging does not wait for the disk.
+        - level: Logging level (e.g. 'INFO', 'DEBUG'); records below it are dropped before formatting.
+        - structured_events: Also write the events of log_event as JSON lines to events_<run id>.jsonl.
+        """
         self.logs_dir = logs_dir
         self.names_of_files_under_procession = names_of_files_under_procession
         self.metadata_manager = metadata_manager
+        self.asynchronous = asynchronous
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self.structured_events = structured_events
+        # Fields added to every event (e.g. file_id, step), see set_context
+        self.context = {}
         self._setup_logging()  # Call the setup logging method
 
     def _get_log_file_path(self) -> str:
         date_time_str = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
         return os.path.join(self.logs_dir, f'log_{date_time_str}.log')
 
+    def _create_handler(self, file_path: str, formatter: logging.Formatter) -> logging.Handler:
+        """
+        File handler with UTF-8 encoding; in asynchronous mode wrapped in a QueueHandler whose
+        listener thread writes the records.
+        """
+        fh = logging.FileHandler(file_path, encoding='utf-8')
+        fh.setLevel(logging.DEBUG)
+        fh.setFormatter(formatter)
+        if not self.asynchronous:
+            return fh
+        # The caller renders the message and enqueues the record (QueueHandler.prepare);
+        # the listener thread adds the time stamp and level and writes it
+        log_queue = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(log_queue)
+        handler.listener = logging.handlers.QueueListener(log_queue, fh, respect_handler_level=True)
+        handler.listener.start()
+        handler.listener_running = True
+        handler.baseFilename = fh.baseFilename
+        handler.file_handler = fh
+        return handler
+
+    @staticmethod
+    def _attached_file_path(logger: logging.Logger):
+        for handler in logger.handlers:
+            if isinstance(handler, (logging.FileHandler, logging.handlers.QueueHandler)) \
+                    and hasattr(handler, 'baseFilename'):
+                return handler.baseFilename
+        return None
+
     def _setup_logging(self):
         if not os.path.exists(self.logs_dir):
             os.makedirs(self.logs_dir)
         log_file_path = self._get_log_file_path()
+        self.log_file_path = log_file_path
         self.logger = logging.getLogger('LogManager')
-        self.logger.setLevel(logging.INFO)
+        self.logger.setLevel(self.level)
         # Check if the logger already has handlers to avoid duplicate logs
         if not self.logger.handlers:
-            # Create file handler with UTF-8 encoding
-            fh = logging.FileHandler(log_file_path, encoding='utf-8')
-            fh.setLevel(logging.INFO)
             # Create formatter
             formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-            fh.setFormatter(formatter)
             # Add handler to logger
-            self.logger.addHandler(fh)
+            self.logger.addHandler(self._create_handler(log_file_path, formatter))
+        else:
+            # Reuse the file of the handler that is already attached
+            self.log_file_path = self._attached_file_path(self.logger) or log_file_path
+
+        # The run id is the time stamp of the log file, shared by the events file
+        self.run_id = os.path.splitext(os.path.basename(self.log_file_path))[0].replace('log_', '', 1)
+        self.events_file_path = os.path.join(os.path.dirname(self.log_file_path), f'events_{self.run_id}.jsonl')
+        self.event_logger = logging.getLogger('LogManager.events')
+        self.event_logger.propagate = False
+        self.event_logger.setLevel(logging.INFO)
+        if self.structured_events:
+            attached_path = self._attached_file_path(self.event_logger)
+            if attached_path is None:
+                self.event_logger.addHandler(self._create_handler(self.events_file_path, logging.Formatter('%(message)s')))
+            else:
+                self.events_file_path = attached_path
+
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        True if records of this level (e.g. logging.DEBUG) are written.
+        """
+        return self.logger.isEnabledFor(level)
+
+    def _log(self, level: int, message: Message):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, message() if callable(message) else message)
+
+    def log_info(self, message: Message):
+        self._log(logging.INFO, message)
+
+    def log_error(self, message: Message):
+        message = message() if callable(message) else message
+        self._log(logging.ERROR, message)
+        self.log_event('error', message=message)
+
+    def log_warning(self, message: Message):
+        self._log(logging.WARNING, message)
+
+    def log_debug(self, message: Message):
+        self._log(logging.DEBUG, message)
+
+    def set_context(self, **fields):
+        """
+        Set fields added to every following event (e.g. file_id=7, step='filter'); None removes a field.
+        """
+        for key, value in fields.items():
+            if value is None:
+                self.context.pop(key, None)
+            else:
+                self.context[key] = value
+
+    def log_event(self, event: str, **fields):
+        """
+        Write a structured event (one JSON line with time, run_id, the context fields, event and fields).
 
-    def log_info(self, message: str):
-        self.logger.info(message)
+        Parameters:
+        - event: Event type (e.g. 'step', 'stable_detector').
+        - fields: Numeric or text fields of the event (e.g. rows_in=1000, rows_out=800).
+        """
+        if not self.structured_events or self._attached_file_path(self.event_logger) is None:
+            return
+        record = {'time': datetime.now().isoformat(timespec='milliseconds'), 'run_id': self.run_id,
+                  **self.context, 'event': event, **fields}
+        # numpy scalars -> Python numbers
+        self.event_logger.info(json.dumps(record, ensure_ascii=False,
+                                          default=lambda value: value.item() if hasattr(value, 'item') else str(value)))
 
-    def log_error(self, message: str):
-        self.logger.error(message)
+    def _handlers(self) -> list:
+        return self.logger.handlers + self.event_logger.handlers
 
-    def log_warning(self, message: str):
-        self.logger.warning(message)
+    def flush(self):
+        """
+        Write all pending records to the log and events files (waits for the queue to drain in asynchronous mode).
+        """
+        for handler in self._handlers():
+            if getattr(handler, 'listener_running', False):
+                # stop() processes the queued records before it returns
+                handler.listener.stop()
+                handler.listener.start()
+                handler.file_handler.flush()
+            handler.flush()
 
-    def log_debug(self, message: str):
-        self.logger.debug(message)
+    def append_log_text(self, text: str):
+        """
+        Append already formatted log lines (e.g. from a worker process) to the current log file.
+
+        Parameters:
+        - text: The log text to append.
+        """
+        if not text:
+            return
+        self.flush()
+        with open(self.log_file_path, 'a', encoding='utf-8') as f:
+            f.write(text)
+
+    def read_events(self) -> List[dict]:
+        """
+        The events written so far by this LogManager (e.g. to return them from a worker process).
+        """
+        self.flush()
+        if not self.structured_events or not os.path.exists(self.events_file_path):
+            return []
+        with open(self.events_file_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def append_events(self, events: List[dict]):
+        """
+        Append the events of another LogManager (e.g. from a worker process) under the run id of this one.
+
+        Parameters:
+        - events: The events to append.
+        """
+        if not self.structured_events or not events:
+            return
+        self.flush()
+        with open(self.events_file_path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(dict(event, run_id=self.run_id), ensure_ascii=False) + '\n')
+
+    def stop_listeners(self):
+        """
+        Write the queued records and stop the listener threads of the asynchronous mode, e.g. before worker
+        processes are forked, so they do not inherit a running logging thread. Records logged until
+        start_listeners() wait on the queue.
+        """
+        for handler in self._handlers():
+            if getattr(handler, 'listener_running', False):
+                handler.listener.stop()
+                handler.listener_running = False
+
+    def start_listeners(self):
+        """
+        Restart the listener threads stopped by stop_listeners().
+        """
+        for handler in self._handlers():
+            if getattr(handler, 'listener', None) is not None and not handler.listener_running:
+                handler.listener.start()
+                handler.listener_running = True
+
+    def close(self):
+        """
+        Flush and detach all handlers, so the next LogManager starts a new log file.
+        """
+        # A stopped listener is started once more to write the records queued meanwhile
+        self.start_listeners()
+        self.stop_listeners()
+        for logger in (self.logger, self.event_logger):
+            for handler in list(logger.handlers):
+                if getattr(handler, 'listener', None) is not None:
+                    handler.file_handler.close()
+                handler.flush()
+                handler.close()
+                logger.removeHandler(handler)
 
     def _split_dataframe(self, df, chunk_size):
         """
@@ -60,18 +254,26 @@ class LogManager:
         for i in range(0, df.shape[1], chunk_size):
             yield df.iloc[:, i:i + chunk_size]
 
-    def log_dataframe_in_chunks(self, df, file_name=None, chunk_size=6, rows=3):
+    def log_dataframe_in_chunks(self, df, file_name=None, chunk_size=6, rows=3, level: int = logging.DEBUG,
+                                max_columns: int = LOG_DATAFRAME_MAX_COLUMNS):
         """
-        Log a DataFrame in chunks to improve readability.
+        Log a DataFrame in chunks to improve readability. Nothing is rendered if the level is disabled.
 
         Parameters:
         - df: The DataFrame to log.
         - file_name: The name of the file the data was loaded from (optional).
         - chunk_size: The number of columns per chunk.
         - rows: The number of rows to display per chunk.
+        - level: Logging level of the preview (e.g. logging.INFO).
+        - max_columns: Maximum number of columns rendered; the others are only counted.
         """
-        for chunk in self._split_dataframe(df, chunk_size):
+        if not self.is_enabled_for(level):
+            return
+        preview = df.iloc[:rows, :max_columns]
+        for chunk in self._split_dataframe(preview, chunk_size):
             if file_name:
-                self.logger.info(f"Data from file '{file_name}':\n{tabulate(chunk.head(rows), headers='keys', tablefmt='fancy_grid')}")
+                self._log(level, f"Data from file '{file_name}':\n{tabulate(chunk, headers='keys', tablefmt='fancy_grid')}")
             else:
-                self.logger.info(f"DataFrame chunk:\n{tabulate(chunk.head(rows), headers='keys', tablefmt='fancy_grid')}")
+                self._log(level, f"DataFrame chunk:\n{tabulate(chunk, headers='keys', tablefmt='fancy_grid')}")
+        if df.shape[1] > max_columns:
+            self._log(level, f"... {df.shape[1] - max_columns} more columns not shown.")
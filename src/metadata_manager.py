@@ -3,18 +3,42 @@ import json
 import logging
 from datetime import datetime
 from typing import Any, Dict, List
+import numpy as np
 import pandas as pd
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _json_default(value: Any):
+    # numpy scalars (e.g. float32 values of compact raw files) are stored as Python numbers
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
 class MetadataManager:
     def __init__(self, metadata_dir: str, 
-                 names_of_files_under_procession: List[str] = None):
-        
+                 names_of_files_under_procession: List[str] = None,
+                 buffered: bool = False,
+                 flush_every: int = 500):
+        """
+        Initialize the MetadataManager.
+
+        Parameters:
+        - metadata_dir: Directory for the metadata_vX.json files.
+        - names_of_files_under_procession: A list of file names under procession.
+        - buffered: If True, updates are kept in memory and appended to a JSON-lines journal
+                    (metadata_vX.jsonl) on flush(); close() compacts the journal into metadata_vX.json.
+                    If False, metadata_vX.json is rewritten on every update.
+        - flush_every: In buffered mode, flush automatically after this many pending updates.
+        """
         self.metadata_dir = metadata_dir
         self.names_of_files_under_procession = names_of_files_under_procession
+        self.buffered = buffered
+        self.flush_every = flush_every
+        self._pending_updates = []
+        # Journals left by a run that crashed before close() become metadata_vX.json first
+        self._compact_orphan_journals()
         self.version = self._get_next_version()
         self.metadata = self._load_existing_metadata()
         if not os.path.exists(self.metadata_dir):
@@ -32,7 +56,7 @@ class MetadataManager:
         return f'v{major}.{minor + 1}'
 
     def _load_existing_metadata(self) -> Dict[str, Any]:
-        file_path = os.path.join(self.metadata_dir, f'metadata_{self.version}.json')
+        file_path = self._get_metadata_file_path()
         if os.path.exists(file_path):
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
@@ -48,18 +72,113 @@ class MetadataManager:
                 return {}
         return {}
 
+    def _get_metadata_file_path(self, version: str = None) -> str:
+        return os.path.join(self.metadata_dir, f'metadata_{version or self.version}.json')
+
+    def _get_journal_file_path(self, version: str = None) -> str:
+        return os.path.join(self.metadata_dir, f'metadata_{version or self.version}.jsonl')
+
     def update_metadata(self, step: int, key: str, value: Any):
         if isinstance(value, pd.DataFrame):
             value = value.astype(str).to_dict(orient='list')
         elif isinstance(value, pd.Series):
             value = value.astype(str).to_dict()
+        self._set_value(step, key, value)
+        if self.buffered:
+            if len(self._pending_updates) >= self.flush_every:
+                self.flush()
+        else:
+            self._save_metadata()
+
+    def merge_metadata(self, metadata: Dict[str, Dict[str, Any]]):
+        """
+        Merge metadata collected by another MetadataManager (e.g. in a worker process).
+
+        Parameters:
+        - metadata: Nested metadata dictionary {step: {key: value}}.
+        """
+        for step, values in metadata.items():
+            for key, value in values.items():
+                self._set_value(step, key, value)
+        if not self.buffered:
+            self._save_metadata()
+
+    def _set_value(self, step: int, key: str, value: Any):
         if str(step) not in self.metadata:
             self.metadata[str(step)] = {}
         self.metadata[str(step)][key] = value
-        self._save_metadata()
+        if self.buffered:
+            self._pending_updates.append({"step": str(step), "key": key, "value": value})
+
+    def flush(self):
+        """
+        Append the pending updates to the JSON-lines journal (buffered mode only).
+        """
+        if not self.buffered or not self._pending_updates:
+            return
+        if not os.path.exists(self.metadata_dir):
+            os.makedirs(self.metadata_dir)
+        journal_path = self._get_journal_file_path()
+        with open(journal_path, 'a', encoding='utf-8') as f:
+            for record in self._pending_updates:
+                f.write(json.dumps(record, ensure_ascii=False, default=_json_default) + '\n')
+        logger.info(f"{len(self._pending_updates)} metadata updates appended to {journal_path}")
+        self._pending_updates = []
+
+    def close(self):
+        """
+        Flush the pending updates and compact the journal into metadata_vX.json (buffered mode only).
+        """
+        if not self.buffered:
+            return
+        self.flush()
+        self._compact_journal()
+
+    def _compact_orphan_journals(self):
+        """
+        Compact the metadata_vX.jsonl journals of earlier runs that were not closed (e.g. after a crash).
+        """
+        if not os.path.isdir(self.metadata_dir):
+            return
+        for file_name in sorted(os.listdir(self.metadata_dir)):
+            if file_name.startswith('metadata_v') and file_name.endswith('.jsonl'):
+                version = file_name[len('metadata_'):-len('.jsonl')]
+                logger.warning(f"Metadata journal {file_name} of an unfinished run found, compacting it.")
+                self._compact_journal(version)
+
+    def _compact_journal(self, version: str = None):
+        journal_path = self._get_journal_file_path(version)
+        if not os.path.exists(journal_path):
+            return
+        file_path = self._get_metadata_file_path(version)
+        existing_metadata = {}
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    existing_metadata = json.load(f)
+            except json.JSONDecodeError:
+                logger.error(f"Corrupted JSON file at {file_path}. Overwriting with journal content.")
+
+        # Replay the journal in order, later updates win
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave the last line half written
+                    logger.error(f"Skipping a corrupted line of {journal_path}.")
+                    continue
+                existing_metadata.setdefault(record["step"], {})[record["key"]] = record["value"]
+
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(existing_metadata, f, ensure_ascii=False, indent=4, default=_json_default)
+        os.remove(journal_path)
+        logger.info(f"Metadata journal {journal_path} compacted into {file_path}")
 
     def _save_metadata(self):
-        file_path = os.path.join(self.metadata_dir, f'metadata_{self.version}.json')
+        file_path = self._get_metadata_file_path()
         # Load existing metadata if the file exists
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -78,7 +197,7 @@ class MetadataManager:
         existing_metadata.update(self.metadata)
         # Save the updated metadata back to the file
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(existing_metadata, f, ensure_ascii=False, indent=4)
+            json.dump(existing_metadata, f, ensure_ascii=False, indent=4, default=_json_default)
         
         logger.info(f"Metadata saved to {file_path}")
 
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+from contextlib import contextmanager
+from typing import List
+import pandas as pd
+from tabulate import tabulate
+from src.log_manager import LogManager
+
+try:
+    import resource  # Unix
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of the current process (high-water mark), or None if it cannot be read.
+    """
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), 'peak_wset', None)  # Windows
+    return None
+
+
+class PipelineProfiler:
+    """
+    Records wall time, CPU time, peak RSS and row counts of the pipeline steps.
+    """
+
+    def __init__(self, log_manager: LogManager = None):
+        """
+        Initialize the PipelineProfiler.
+
+        Parameters:
+        - log_manager: An instance of LogManager for logging.
+        """
+        self.log_manager = log_manager
+        self.records = []
+
+    @contextmanager
+    def step(self, item_id, step_name: str, rows_in: int = None):
+        """
+        Profile one pipeline step of one item (with a log_manager, the step is also written as a
+        structured 'step' event and is the context of the events inside the block):
+
+            with profiler.step(item_id, 'load') as record:
+                df = ...
+                record['rows_out'] = len(df)
+
+        Parameters:
+        - item_id: ID of the item (file) under procession.
+        - step_name: Name of the step (e.g. 'load', 'filter').
+        - rows_in: Number of input rows (optional).
+
+        Yields:
+        - The record of the step; set 'rows_out' (and 'rows_in') inside the block.
+        """
+        record = {'item_id': item_id, 'step': step_name, 'rows_in': rows_in, 'rows_out': None, 'status': 'ok'}
+        if self.log_manager:
+            self.log_manager.set_context(file_id=item_id, step=step_name)
+        peak_before = peak_rss_bytes()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        except Exception:
+            record['status'] = 'error'
+            raise
+        finally:
+            record['wall_s'] = time.perf_counter() - wall_start
+            record['cpu_s'] = time.process_time() - cpu_start
+            peak_after = peak_rss_bytes()
+            record['peak_rss_mb'] = peak_after / 2 ** 20 if peak_after is not None else None
+            record['peak_rss_delta_mb'] = (
+                (peak_after - peak_before) / 2 ** 20 if peak_after is not None and peak_before is not None else None
+            )
+            self.records.append(record)
+            if self.log_manager:
+                self.log_manager.log_event('step', **{key: value for key, value in record.items()
+                                                      if key not in ('item_id', 'step')})
+                self.log_manager.set_context(step=None)
+
+    def merge_records(self, records: List[dict]) -> None:
+        """
+        Add the records of another profiler (e.g. from a worker process).
+        """
+        self.records.extend(records)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Totals per step over all items, sorted by wall time.
+
+        Returns:
+        - DataFrame with items, wall_s, cpu_s, max peak_rss_delta_mb, rows_in, rows_out and errors per step.
+        """
+        if not self.records:
+            return pd.DataFrame()
+        records_df = pd.DataFrame(self.records)
+        summary_df = records_df.groupby('step', sort=False).agg(
+            items=('item_id', 'nunique'),
+            wall_s=('wall_s', 'sum'),
+            cpu_s=('cpu_s', 'sum'),
+            peak_rss_delta_mb=('peak_rss_delta_mb', 'max'),
+            rows_in=('rows_in', lambda rows: rows.sum(min_count=1)),
+            rows_out=('rows_out', lambda rows: rows.sum(min_count=1)),
+            errors=('status', lambda status: int((status == 'error').sum())),
+        )
+        summary_df[['rows_in', 'rows_out']] = summary_df[['rows_in', 'rows_out']].astype('Int64')
+        summary_df['wall_share'] = summary_df['wall_s'] / summary_df['wall_s'].sum()
+        return summary_df.sort_values('wall_s', ascending=False).reset_index()
+
+    def log_summary(self) -> str:
+        """
+        Log the per-step summary as a table.
+
+        Returns:
+        - The table text.
+        """
+        summary_df = self.summary()
+        if summary_df.empty:
+            return ''
+        table = tabulate(summary_df, headers='keys', tablefmt='grid', showindex=False, floatfmt='.3f')
+        if self.log_manager:
+            self.log_manager.log_info(f"Pipeline profile ({len(self.records)} step records):\n{table}")
+        return table
+
+    def save(self, file_path: str) -> None:
+        """
+        Save the records and the summary as JSON.
+
+        Parameters:
+        - file_path: Destination path of the .json file.
+        """
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'records': self.records,
+                'summary': self.summary().to_dict(orient='records'),
+            }, f, ensure_ascii=False, indent=4, default=str)
+        if self.log_manager:
+            self.log_manager.log_info(f"Pipeline profile saved to {file_path}")
@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import List
+
+# Statistics of every channel in the summary (column '<channel>_<statistic>')
+SEGMENT_STATISTICS = ['mean', 'std', 'min', 'max', 'count']
+
+
+def summarize_segments(df: pd.DataFrame, stable_intervals: np.ndarray,
+                       static_columns: List[str] = None, metadata: dict = None,
+                       time_column: str = 'Time') -> pd.DataFrame:
+    """
+    One row per stable segment (steady-state operating point) instead of every raw row.
+
+    Parameters:
+    - df: Processed rows inside the stable intervals.
+    - stable_intervals: Array of shape (k, 2) with the [start, end] time of every segment
+                        (DataFilter.stable_intervals); None (stable detection found no periods) = no segments.
+    - static_columns: Columns with one value per file (e.g. fuel properties); copied, not aggregated.
+    - metadata: {column: value} added to every row (e.g. fuel and test date).
+    - time_column: Name of the time column.
+
+    Returns:
+    - DataFrame with 'segment', 'start_time', 'end_time', 'duration_s', the metadata and static columns
+      and '<channel>_<statistic>' for every numeric channel and SEGMENT_STATISTICS (empty without segments).
+    """
+    static_columns = [col for col in (static_columns or []) if col in df.columns]
+    if stable_intervals is None or len(stable_intervals) == 0 or df.empty:
+        return pd.DataFrame()
+    intervals = np.asarray(stable_intervals)
+    times = df[time_column].to_numpy()
+    segment = np.searchsorted(intervals[:, 0], times, side='right') - 1
+    inside = segment >= 0
+    inside[inside] = times[inside] <= intervals[segment[inside], 1]
+
+    channels = [
+        col for col in df.select_dtypes(include='number').columns
+        if col != time_column and col not in static_columns
+    ]
+    grouped = df.loc[inside, channels + static_columns].groupby(segment[inside])
+    statistics = grouped[channels].agg(SEGMENT_STATISTICS)
+    statistics.columns = [f"{col}_{statistic}" for col, statistic in statistics.columns]
+
+    index = statistics.index.to_numpy()
+    summary = pd.DataFrame({
+        'segment': index,
+        'start_time': intervals[index, 0],
+        'end_time': intervals[index, 1],
+    }, index=statistics.index)
+    summary['duration_s'] = (summary['end_time'] - summary['start_time']).dt.total_seconds()
+    for key, value in (metadata or {}).items():
+        summary[key] = value
+    if static_columns:
+        summary = summary.join(grouped[static_columns].first())
+    return summary.join(statistics).reset_index(drop=True)
+
+
+def save_segments(summary: pd.DataFrame, file_path: str) -> None:
+    """
+    Save the segment summary of one file as parquet.
+
+    Parameters:
+    - summary: Output of summarize_segments.
+    - file_path: Destination path.
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    summary.to_parquet(file_path, index=False)
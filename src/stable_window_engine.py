@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Tuple
+from src.log_manager import LogManager
+from src.utils.rolling_window import rolling_range
+
+
+class StableWindowEngine:
+    """
+    Finds stable periods for several channels in one pass over a shared time index.
+    A sample is stable when max - min of its channel over the trailing time window is ≤ threshold.
+    """
+
+    def __init__(self, df: pd.DataFrame,
+                 rules: Dict[str, Tuple[float, str]],
+                 time_column: str = 'Time',
+                 log_manager: LogManager = None):
+        """
+        Initialize the StableWindowEngine.
+
+        Parameters:
+        - df: DataFrame sorted by the time column.
+        - rules: {column: (threshold, window)}, e.g. {'Obroty[obr/min]': (20, '8000ms')}.
+        - time_column: Name of the time column (datetime or milliseconds).
+        - log_manager: An instance of LogManager for logging.
+        """
+        self.df = df
+        self.rules = rules
+        self.time_column = time_column
+        self.log_manager = log_manager
+
+    def run(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Computes the rolling ranges of all rule columns and labels the stable runs.
+
+        Returns:
+        - {column: runs} where runs holds 'start_index' and 'end_index' (positions, inclusive),
+          'start_time', 'end_time', 'count', 'mean' (one entry per stable run)
+          and 'stable_points' (number of stable samples).
+        """
+        columns = [col for col in self.rules if col in self.df.columns]
+        missing_columns = [col for col in self.rules if col not in self.df.columns]
+        if missing_columns and self.log_manager:
+            self.log_manager.log_error(f"Columns {missing_columns} not found in DataFrame.")
+        if not columns:
+            return {}
+
+        times = self.df[self.time_column]
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            times = pd.to_datetime(times, unit='ms')
+        time_values = times.to_numpy()
+
+        # One rolling-range kernel call per distinct window over the shared time index
+        roll_diffs = {}
+        windows = {}
+        for col in columns:
+            windows.setdefault(self.rules[col][1], []).append(col)
+        for window, window_columns in windows.items():
+            roll_diffs.update(rolling_range(time_values, {col: self.df[col].to_numpy() for col in window_columns}, window))
+            if self.log_manager:
+                self.log_manager.log_info(f"Computed rolling max - min of {window_columns} with window='{window}'.")
+
+        results = {}
+        for col in columns:
+            threshold = self.rules[col][0]
+            stable_mask = roll_diffs[col] <= threshold
+            runs = self._label_runs(stable_mask, self.df[col].to_numpy(dtype=float))
+            runs['start_time'] = time_values[runs['start_index']]
+            runs['end_time'] = time_values[runs['end_index']]
+            runs['stable_points'] = int(stable_mask.sum())
+            results[col] = runs
+        return results
+
+    @staticmethod
+    def _label_runs(stable_mask: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Labels contiguous runs of stable samples and computes the mean value of every run.
+
+        Parameters:
+        - stable_mask: Boolean array, True for stable samples.
+        - values: Channel values (NaN values are ignored in the means).
+
+        Returns:
+        - Dictionary with 'start_index', 'end_index', 'count' and 'mean' per run.
+        """
+        padded = np.concatenate(([False], stable_mask, [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        start_index = edges[0::2]
+        end_index = edges[1::2] - 1
+        statistics = segment_statistics(values, start_index, end_index)
+
+        return {
+            'start_index': start_index,
+            'end_index': end_index,
+            'count': statistics['count'],
+            'mean': statistics['mean'],
+        }
+
+
+def segment_statistics(values: np.ndarray, start_index: np.ndarray, end_index: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-segment count, sum and mean of contiguous index ranges in O(n + k). The counts come from one
+    cumulative count; every sum is taken over its own slice (numpy pairwise summation, the same as
+    pandas' mean of the slice), because differences of one running sum over a long recording lose precision.
+
+    Parameters:
+    - values: Channel values (NaN values are ignored).
+    - start_index: First position of every segment.
+    - end_index: Last position of every segment (inclusive).
+
+    Returns:
+    - Dictionary with 'count' (samples), 'valid_count' (non-NaN samples), 'sum' and 'mean'
+      (NaN for segments without values), one entry per segment.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    start_index = np.asarray(start_index, dtype=np.int64)
+    end_index = np.asarray(end_index, dtype=np.int64)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    cumulative_count = np.concatenate(([0], np.cumsum(valid)))
+
+    sums = np.array([filled[start:end + 1].sum() for start, end in zip(start_index, end_index)], dtype=np.float64)
+    valid_counts = cumulative_count[end_index + 1] - cumulative_count[start_index]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / valid_counts
+    return {
+        'count': end_index - start_index + 1,
+        'valid_count': valid_counts,
+        'sum': sums,
+        'mean': means,
+    }
+
+
+def mask_to_intervals(times: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Converts a boolean mask over sorted times into [start, end] intervals of the True runs.
+
+    Parameters:
+    - times: Sorted time values.
+    - mask: Boolean array of the same length.
+
+    Returns:
+    - Array of shape (k, 2) with the first and last time of every run.
+    """
+    padded = np.concatenate(([False], np.asarray(mask, dtype=bool), [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return np.column_stack((times[edges[0::2]], times[edges[1::2] - 1]))
+
+
+def intersect_intervals(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Intersects two sorted lists of disjoint, closed [start, end] intervals with a sorted merge.
+
+    Parameters:
+    - first: Array of shape (k, 2).
+    - second: Array of shape (m, 2).
+
+    Returns:
+    - Array of shape (n, 2) with the sorted intersection intervals.
+    """
+    result = []
+    i, j = 0, 0
+    while i < len(first) and j < len(second):
+        start = max(first[i, 0], second[j, 0])
+        end = min(first[i, 1], second[j, 1])
+        if start <= end:
+            result.append((start, end))
+        # Move on from the interval that ends first
+        if first[i, 1] < second[j, 1]:
+            i += 1
+        else:
+            j += 1
+    if not result:
+        return np.empty((0, 2), dtype=first.dtype)
+    return np.array(result, dtype=first.dtype)
+
+
+def intervals_mask(times: np.ndarray, intervals: np.ndarray) -> np.ndarray:
+    """
+    Marks the sorted times that fall inside any of the disjoint, closed intervals.
+
+    Parameters:
+    - times: Sorted time values.
+    - intervals: Array of shape (k, 2), sorted and disjoint.
+
+    Returns:
+    - Boolean mask over times.
+    """
+    start_index = np.searchsorted(times, intervals[:, 0], side='left')
+    end_index = np.searchsorted(times, intervals[:, 1], side='right')
+    delta = np.zeros(len(times) + 1, dtype=np.int64)
+    np.add.at(delta, start_index, 1)
+    np.add.at(delta, end_index, -1)
+    return np.cumsum(delta[:-1]) > 0
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+from src.log_manager import LogManager
+from src.data_filter import DEFAULT_STABLE_RULES
+from src.stable_window_engine import segment_statistics
+from src.utils.rolling_window import rolling_range
+
+
+class StreamingStableDetector:
+    """
+    Detects steady-state operating points while a test is still running.
+
+    The detector is fed batches of samples in time order. A sample is stable when every rule
+    column is stable (max - min over the trailing window ≤ threshold, the same criterion as
+    the 'stable' detectors of DataFilter.filter_all_stable_periods). Contiguous stable
+    samples form a segment; a segment is emitted with its mean operating point as soon as it ends.
+    Only the samples of the last window and the running sums of the open segment are kept in memory.
+    """
+
+    def __init__(self, rules: Dict[str, Tuple[float, str]] = None,
+                 time_column: str = 'Time',
+                 log_manager: LogManager = None):
+        """
+        Initialize the StreamingStableDetector.
+
+        Parameters:
+        - rules: {column: (threshold, window)} (default: DEFAULT_STABLE_RULES).
+        - time_column: Name of the time column (datetime or milliseconds).
+        - log_manager: An instance of LogManager for logging.
+        """
+        self.rules = rules or DEFAULT_STABLE_RULES
+        self.time_column = time_column
+        self.log_manager = log_manager
+        self.max_window = max(pd.Timedelta(window) for _, window in self.rules.values())
+        self._windows = {}
+        for col, (_, window) in self.rules.items():
+            self._windows.setdefault(window, []).append(col)
+        # Samples of the last window (needed by the rolling ranges of the next batch)
+        self._tail_times = np.empty(0, dtype='datetime64[ns]')
+        self._tail_values = {col: np.empty(0) for col in self.rules}
+        # Open segment: start/end time, number of samples and the running sums per column
+        self._segment = None
+        self.samples_seen = 0
+
+    def update(self, batch: pd.DataFrame) -> List[dict]:
+        """
+        Feed the next batch of samples.
+
+        Parameters:
+        - batch: DataFrame with the time column and all rule columns, sorted by time
+                 and not earlier than the previous batch.
+
+        Returns:
+        - List of the segments that ended in this batch (see _close_segment).
+        """
+        missing_columns = [col for col in [self.time_column, *self.rules] if col not in batch.columns]
+        if missing_columns:
+            raise KeyError(f"Columns {missing_columns} not found in batch.")
+        times = batch[self.time_column]
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            times = pd.to_datetime(times, unit='ms')
+        times = times.to_numpy().astype('datetime64[ns]')
+        if len(times) == 0:
+            return []
+        if len(self._tail_times) and times[0] < self._tail_times[-1]:
+            raise ValueError("Batches must be fed in time order.")
+
+        values = {col: batch[col].to_numpy(dtype=float) for col in self.rules}
+        all_times = np.concatenate((self._tail_times, times))
+        all_values = {col: np.concatenate((self._tail_values[col], values[col])) for col in self.rules}
+
+        # Stable mask of the new samples, computed over tail + batch
+        n_tail = len(self._tail_times)
+        stable_mask = np.ones(len(times), dtype=bool)
+        for window, window_columns in self._windows.items():
+            ranges = rolling_range(all_times, {col: all_values[col] for col in window_columns}, window)
+            for col in window_columns:
+                stable_mask &= ranges[col][n_tail:] <= self.rules[col][0]
+
+        # Keep only the samples that can still fall into a future window
+        keep = all_times > all_times[-1] - self.max_window.to_timedelta64()
+        self._tail_times = all_times[keep]
+        self._tail_values = {col: all_values[col][keep] for col in self.rules}
+        self.samples_seen += len(times)
+
+        return self._update_segments(times, values, stable_mask)
+
+    def flush(self) -> List[dict]:
+        """
+        End of the recording: emit the open segment (if any).
+
+        Returns:
+        - List with the last segment, or an empty list.
+        """
+        if self._segment is None:
+            return []
+        return [self._close_segment()]
+
+    def _update_segments(self, times: np.ndarray, values: Dict[str, np.ndarray], stable_mask: np.ndarray) -> List[dict]:
+        finished = []
+        padded = np.concatenate(([False], stable_mask, [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1])
+        if self._segment is not None and not stable_mask[0]:
+            finished.append(self._close_segment())
+
+        starts, ends = edges[0::2], edges[1::2]
+        statistics = {col: segment_statistics(values[col], starts, ends - 1) for col in self.rules}
+        for run, (start, end) in enumerate(zip(starts, ends)):
+            if self._segment is None:
+                self._segment = {
+                    'start_time': times[start],
+                    'samples': 0,
+                    'sums': {col: 0.0 for col in self.rules},
+                    'counts': {col: 0 for col in self.rules},
+                }
+            # A run starting at the first sample continues the segment of the previous batch
+            self._segment['end_time'] = times[end - 1]
+            self._segment['samples'] += end - start
+            for col in self.rules:
+                self._segment['sums'][col] += float(statistics[col]['sum'][run])
+                self._segment['counts'][col] += int(statistics[col]['valid_count'][run])
+            if end < len(times):
+                finished.append(self._close_segment())
+        return finished
+
+    def _close_segment(self) -> dict:
+        """
+        Finish the open segment.
+
+        Returns:
+        - Dictionary with 'start_time', 'end_time', 'duration', 'samples' and
+          'mean' ({column: mean value over the segment}).
+        """
+        segment = self._segment
+        self._segment = None
+        mean = {
+            col: segment['sums'][col] / segment['counts'][col] if segment['counts'][col] else float('nan')
+            for col in self.rules
+        }
+        result = {
+            'start_time': pd.Timestamp(segment['start_time']),
+            'end_time': pd.Timestamp(segment['end_time']),
+            'duration': pd.Timestamp(segment['end_time']) - pd.Timestamp(segment['start_time']),
+            'samples': segment['samples'],
+            'mean': mean,
+        }
+        if self.log_manager:
+            self.log_manager.log_info(f"Stable segment {result['start_time']} - {result['end_time']} "
+                                      f"({result['samples']} samples): {mean}")
+        return result
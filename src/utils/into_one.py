@@ -1,18 +1,17 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import argparse
+import collections
 import glob
+import json
 import os
-from src.config import PROCESSED_DATA_WITH_FUELS_FILE_DIR
-
-# Use the provided config directory instead of the script's directory
-data_dir = PROCESSED_DATA_WITH_FUELS_FILE_DIR
-
-# Get list of all .parquet files in the data_dir
-parquet_files = glob.glob(os.path.join(data_dir, '*.parquet'))
-
-# Check if any parquet files were found
-if not parquet_files:
-    print("No parquet files found in the specified directory.")
-    exit()
+import re
+import shutil
+from src.config import (
+    PROCESSED_DATA_WITH_FUELS_FILE_DIR, PROCESSED_DATA_DATASET_DIR, PROCESSED_DATA_SEGMENTS_DIR, RAW_PARQUET_DATA_DIR
+)
+from src.log_manager import LogManager
 
 # Updated columns list according to the new names provided
 columns_in_dfs = [
@@ -35,25 +34,313 @@ columns_in_dfs = [
     "LHV"
 ]
 
-# Read each file into a DataFrame with specified columns and store in a list
-dfs = []
-for f in parquet_files:
-    try:
-        df = pd.read_parquet(
-            f,
-            columns=columns_in_dfs,
-            engine='fastparquet'
+# Partition columns of the dataset (rpm_band only with an RPM band width)
+PARTITION_COLUMNS = ["fuel", "test_year", "test_month"]
+
+
+def get_test_partitions(json_path: str) -> dict:
+    """
+    Partition values of every processed file, taken from the catalog (only_chosen_fuels.json).
+
+    Parameters:
+    - json_path: Path to the catalog.
+
+    Returns:
+    - {processed file name: {'fuel': ..., 'test_year': ..., 'test_month': ...}}
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        json_data_links = json.load(f)
+
+    partitions = {}
+    for items in json_data_links.values():
+        for item in items:
+            # The test date is 'YYYY-MM'; older catalog entries only have it in the file name ('... - 2015-05.parquet')
+            match = re.search(r'(\d{4})-(\d{2})', item.get('test_date') or item['main_file_name'])
+            if not match:
+                continue
+            year, month = match.groups()
+            partitions[f"{item['main_file_name']}_tr_f.parquet"] = {
+                'fuel': item['fuel'],
+                'test_year': int(year),
+                'test_month': int(month),
+            }
+    return partitions
+
+
+def unified_schema(parquet_files: list, columns: list = None):
+    """
+    Build one schema for all files from their parquet footers (no data is read) and report how they diverge.
+
+    A column keeps its type if it is the same in every file; differing numeric types
+    (e.g. 'Cetane number' int64 vs double) are unified as float64, anything else as string.
+
+    Parameters:
+    - parquet_files: Processed parquet files.
+    - columns: Columns of the unified schema (default columns_in_dfs).
+
+    Returns:
+    - (schema, report) where report holds 'type_conflicts' {column: {type: [files]}},
+      'missing_columns' {column: [files]} (filled with nulls) and 'extra_columns' {file: [columns]} (dropped).
+    """
+    columns = columns or columns_in_dfs
+    types = {col: collections.defaultdict(list) for col in columns}
+    report = {'type_conflicts': {}, 'missing_columns': {}, 'extra_columns': {}}
+    for f in parquet_files:
+        file_name = os.path.basename(f)
+        file_schema = pq.read_schema(f)
+        for col in columns:
+            if col in file_schema.names:
+                types[col][file_schema.field(col).type].append(file_name)
+            else:
+                report['missing_columns'].setdefault(col, []).append(file_name)
+        extra_columns = [col for col in file_schema.names if col not in columns]
+        if extra_columns:
+            report['extra_columns'][file_name] = extra_columns
+
+    fields = []
+    for col in columns:
+        col_types = list(types[col])
+        if len(col_types) == 1:
+            col_type = col_types[0]
+        elif col_types and all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in col_types):
+            col_type = pa.float64()
+        elif col_types and all(pa.types.is_timestamp(t) for t in col_types):
+            col_type = pa.timestamp('ns')
+        else:
+            col_type = pa.string() if col_types else pa.float64()
+        if len(col_types) > 1:
+            report['type_conflicts'][col] = {str(t): files for t, files in types[col].items()}
+        fields.append(pa.field(col, col_type))
+    return pa.schema(fields), report
+
+
+def conform_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """
+    Bring the table of one file to the unified schema: select and order the columns,
+    cast them and add the missing ones as null columns.
+    """
+    arrays = []
+    for field in schema:
+        if field.name in table.column_names:
+            arrays.append(table.column(field.name).cast(field.type))
+        else:
+            arrays.append(pa.nulls(table.num_rows, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def log_schema_report(report: dict, log_manager: LogManager = None) -> None:
+    """
+    Print (and log) the schema divergences found by unified_schema.
+    """
+    messages = []
+    for col, files_by_type in report['type_conflicts'].items():
+        summary = ', '.join(f"{col_type} in {len(files)} files" for col_type, files in files_by_type.items())
+        messages.append(f"Column '{col}' has different types ({summary}); cast to the unified type.")
+    for col, files in report['missing_columns'].items():
+        messages.append(f"Column '{col}' is missing in {len(files)} files ({files}); filled with nulls.")
+    for file_name, extra_columns in report['extra_columns'].items():
+        messages.append(f"File {file_name} has extra columns {extra_columns}; dropped.")
+    if not messages:
+        messages.append("All files have the same schema.")
+    for message in messages:
+        print(message)
+        if log_manager:
+            log_manager.log_warning(message)
+
+
+def add_partition_columns(table: pa.Table, partition: dict, rpm_band_width: int = None) -> pa.Table:
+    """
+    Append the partition columns to the table of one file.
+
+    Parameters:
+    - table: Table of one file (in the unified schema).
+    - partition: Partition values of the file.
+    - rpm_band_width: Width of the RPM bands (e.g. 400 -> bands 800, 1200, ...). None = no RPM band.
+
+    Returns:
+    - Table with the partition columns.
+    """
+    for col in PARTITION_COLUMNS:
+        table = table.append_column(col, pa.array([partition[col]] * table.num_rows))
+    if rpm_band_width:
+        rpm = table.column('RPM').to_numpy()
+        rpm_band = (rpm // rpm_band_width * rpm_band_width).astype('int64')
+        table = table.append_column('rpm_band', pa.array(rpm_band, mask=pd.isna(rpm)))
+    return table
+
+
+def write_partitioned_dataset(parquet_files: list, dataset_dir: str, partitions: dict,
+                              rpm_band_width: int = None, schema: pa.Schema = None) -> int:
+    """
+    Write the processed files as a Hive-partitioned parquet dataset
+    (dataset_dir/fuel=HVO25/test_year=2024/test_month=1/...), one file at a time.
+    Readers can skip whole partitions, e.g. read_dataset(filters=[('fuel', '=', 'HVO25')]).
+
+    Parameters:
+    - parquet_files: Processed parquet files.
+    - dataset_dir: Root folder of the dataset (rewritten from scratch).
+    - partitions: Partition values per processed file name (get_test_partitions).
+    - rpm_band_width: Also partition by RPM band of this width.
+    - schema: Unified schema of the files (built with unified_schema if None).
+
+    Returns:
+    - Number of rows written.
+    """
+    if schema is None:
+        schema, _ = unified_schema(parquet_files)
+    if os.path.exists(dataset_dir):
+        shutil.rmtree(dataset_dir)
+    os.makedirs(dataset_dir)
+
+    partition_cols = PARTITION_COLUMNS + (['rpm_band'] if rpm_band_width else [])
+    rows = 0
+    for f in parquet_files:
+        file_name = os.path.basename(f)
+        partition = partitions.get(file_name)
+        if partition is None:
+            print(f"File {f} is not in the catalog (fuel and test date unknown). Skipping.")
+            continue
+        table = pq.read_table(f, columns=[col for col in schema.names if col in pq.read_schema(f).names])
+        table = add_partition_columns(conform_table(table, schema), partition, rpm_band_width)
+        pq.write_to_dataset(
+            table, dataset_dir, partition_cols=partition_cols,
+            basename_template=f"{os.path.splitext(file_name)[0]}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
         )
-        dfs.append(df)
-        print(df.shape)
-    except KeyError:
-        print(f"File {f} does not contain all required columns. Skipping.")
+        rows += table.num_rows
+        print(f"{file_name}: {table.num_rows} rows -> {partition}")
+    return rows
+
+
+def read_dataset(dataset_dir: str = PROCESSED_DATA_DATASET_DIR, filters=None, columns: list = None) -> pd.DataFrame:
+    """
+    Read the partitioned dataset; the filters on partition columns are applied to the folders,
+    so the files of the other partitions are not opened.
+
+    Parameters:
+    - dataset_dir: Root folder of the dataset.
+    - filters: pyarrow filters, e.g. [('fuel', '=', 'HVO25'), ('test_year', '=', 2024)].
+    - columns: Columns to read (None = all).
+
+    Returns:
+    - DataFrame with the selected rows.
+    """
+    return pq.read_table(dataset_dir, partitioning='hive', filters=filters, columns=columns).to_pandas()
+
+
+def write_combined_files(parquet_files: list, target_dir: str, schema: pa.Schema = None) -> int:
+    """
+    Write the single combined.parquet (and combined.arrow) file with all processed files.
+    The files are streamed one at a time into one writer per output, so peak memory
+    is bounded by the largest single file.
+
+    Parameters:
+    - parquet_files: Processed parquet files.
+    - target_dir: Folder of the combined files.
+    - schema: Unified schema of the files (built with unified_schema if None).
+
+    Returns:
+    - Number of rows written.
+    """
+    if schema is None:
+        schema, _ = unified_schema(parquet_files)
+    combined_path = os.path.join(target_dir, 'combined.parquet')
+    # Arrow IPC copy for memory-mapped loading (src.arrow_store.open_arrow)
+    combined_arrow_path = os.path.join(target_dir, 'combined.arrow')
+
+    rows = 0
+    with pq.ParquetWriter(f"{combined_path}.tmp", schema) as parquet_writer, \
+            pa.ipc.new_file(f"{combined_arrow_path}.tmp", schema) as arrow_writer:
+        for f in parquet_files:
+            table = pq.read_table(f, columns=[col for col in schema.names if col in pq.read_schema(f).names])
+            table = conform_table(table, schema)
+            parquet_writer.write_table(table)
+            arrow_writer.write_table(table)
+            rows += table.num_rows
+            print(f"{os.path.basename(f)}: {table.num_rows} rows")
+    os.replace(f"{combined_path}.tmp", combined_path)
+    os.replace(f"{combined_arrow_path}.tmp", combined_arrow_path)
+    return rows
+
+
+def find_segment_files(segments_dir: str, target_path: str) -> list:
+    """
+    Segment summary files of the processed items, without the combined file written into the same folder
+    (it also matches '*_segments.parquet' and would be merged into itself on every run).
+
+    Parameters:
+    - segments_dir: Folder of the segment summaries.
+    - target_path: Path of the combined file.
+
+    Returns:
+    - Sorted list of the summary files.
+    """
+    segment_files = sorted(glob.glob(os.path.join(segments_dir, '*_segments.parquet')))
+    return [f for f in segment_files if os.path.abspath(f) != os.path.abspath(target_path)]
+
+
+def write_combined_segments(segment_files: list, target_path: str) -> int:
+    """
+    Write the stable segment summaries of all files (one row per segment) into one parquet file.
+    The summaries are small, so they are concatenated in memory; missing columns become NaN.
+
+    Parameters:
+    - segment_files: Segment summary files (main_all_files.py --segments).
+    - target_path: Path of the combined file.
+
+    Returns:
+    - Number of segments written.
+    """
+    summaries = [pd.read_parquet(f) for f in segment_files]
+    combined_df = pd.concat(summaries, ignore_index=True, sort=False)
+    combined_df.to_parquet(f"{target_path}.tmp", index=False)
+    os.replace(f"{target_path}.tmp", target_path)
+    return len(combined_df)
+
+
+def main(rpm_band_width: int = None, combined: bool = False, segments: bool = False):
+    # Use the provided config directory instead of the script's directory
+    data_dir = PROCESSED_DATA_WITH_FUELS_FILE_DIR
+
+    # Get list of all processed .parquet files in the data_dir
+    parquet_files = sorted(glob.glob(os.path.join(data_dir, '*_tr_f.parquet')))
+
+    # Check if any parquet files were found
+    if not parquet_files:
+        print("No parquet files found in the specified directory.")
+        return
+
+    # One schema for all files; the divergences are reported and saved next to the processed files
+    schema, report = unified_schema(parquet_files)
+    log_schema_report(report)
+    with open(os.path.join(data_dir, 'combined_schema_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+
+    partitions = get_test_partitions(os.path.join(RAW_PARQUET_DATA_DIR, 'only_chosen_fuels.json'))
+    rows = write_partitioned_dataset(parquet_files, PROCESSED_DATA_DATASET_DIR, partitions, rpm_band_width, schema)
+    print(f"Dataset with {rows} rows written to {PROCESSED_DATA_DATASET_DIR}")
+
+    if combined:
+        rows = write_combined_files(parquet_files, data_dir, schema)
+        print(f"combined.parquet with {rows} rows written to {data_dir}")
 
-# Concatenate all DataFrames
-combined_df = pd.concat(dfs, ignore_index=True)
+    if segments:
+        target_path = os.path.join(PROCESSED_DATA_SEGMENTS_DIR, 'combined_segments.parquet')
+        segment_files = find_segment_files(PROCESSED_DATA_SEGMENTS_DIR, target_path)
+        if not segment_files:
+            print("No segment summaries found; run main_all_files.py with --segments first.")
+            return
+        rows = write_combined_segments(segment_files, target_path)
+        print(f"combined_segments.parquet with {rows} segments written to {PROCESSED_DATA_SEGMENTS_DIR}")
 
-# Save the combined DataFrame to a new parquet file
-combined_df.to_parquet(os.path.join(PROCESSED_DATA_WITH_FUELS_FILE_DIR, 'combined.parquet'))
 
-# Print the shape of the resulting DataFrame
-print(combined_df.shape)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Merge the processed files into a partitioned parquet dataset.")
+    parser.add_argument('--rpm-band-width', type=int, default=None,
+                        help="Also partition by RPM band of this width (e.g. 400).")
+    parser.add_argument('--combined', action='store_true',
+                        help="Also write the single combined.parquet/combined.arrow files.")
+    parser.add_argument('--segments', action='store_true',
+                        help="Also merge the stable segment summaries into combined_segments.parquet.")
+    args = parser.parse_args()
+    main(rpm_band_width=args.rpm_band_width, combined=args.combined, segments=args.segments)
@@ -1,9 +1,19 @@
 import os
 import csv
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import time
 import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import chardet
-from src.config import RAW_DATA_DIR
+import numpy as np
+from ftfy import fix_encoding
+from src.config import RAW_DATA_DIR, COLUMN_NAMES_FIXED_METADATA_KEY, COMPACT_MAX_DECIMALS, COMPACT_FLOAT64_CHANNELS
+
+# Rows per CSV chunk (and per parquet row group); bounds the memory used per file
+CHUNK_ROWS = 50000
 
 def detect_encoding(file_path):
     with open(file_path, 'rb') as f:
@@ -11,54 +21,254 @@ def detect_encoding(file_path):
         return result['encoding']
 
 # Function to determine the delimiter
-def detect_delimiter(file_path, sample_size=1024):
-    encoding = detect_encoding(file_path)
+def detect_delimiter(file_path, encoding=None, sample_size=1024):
+    if encoding is None:
+        encoding = detect_encoding(file_path)
     with open(file_path, 'r', encoding=encoding) as file:
         sample = file.read(sample_size)  # Read a sample of the file
         sniffer = csv.Sniffer()
         delimiter = sniffer.sniff(sample).delimiter
     return delimiter
 
-def transform_csv_to_parquet():
-    source_dir = os.path.join(RAW_DATA_DIR, 'all_csv')
-    target_dir = os.path.join(RAW_DATA_DIR, 'parquet_files')
+# Deduplicate column names
+def deduplicate_columns(columns):
+    counts = {}
+    new_columns = []
+    for col in columns:
+        if col in counts:
+            counts[col] += 1
+            new_columns.append(f"{col}_{counts[col]}")
+        else:
+            counts[col] = 0
+            new_columns.append(col)
+    return new_columns
 
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir)
+def chunk_schema(chunk: pd.DataFrame) -> pa.Schema:
+    """
+    Parquet schema of a converted file, inferred from its first chunk.
+
+    Integer (and all-empty) columns are widened to float64, because a later chunk
+    of the same column may contain empty cells or fractions.
+
+    Parameters:
+    - chunk: First chunk of the CSV file.
+
+    Returns:
+    - pyarrow schema used for all row groups of the file.
+    """
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_integer(field.type) or pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.float64()))
+    return schema.with_metadata({COLUMN_NAMES_FIXED_METADATA_KEY: 'true'})
+
+def _decimal_places(values, max_decimals=COMPACT_MAX_DECIMALS):
+    """
+    Smallest number of decimal places that represents all values (None if more than max_decimals).
+    """
+    for decimals in range(max_decimals + 1):
+        scaled = values * 10.0 ** decimals
+        if np.all(np.abs(scaled - np.round(scaled)) <= 1e-9 * np.maximum(1.0, np.abs(scaled))):
+            return decimals
+    return None
+
+def compact_schema(parquet_file, float64_channels=COMPACT_FLOAT64_CHANNELS):
+    """
+    Chooses the smallest lossless type for every floating point column of a raw parquet file.
+
+    - The float64_channels (the detector channels, whose thresholds are compared in float64) are never changed.
+    - Time columns ('Czas [ms]...') with whole milliseconds: int64.
+    - Flag-like columns with only 0 and 1: uint8.
+    - Channels whose float32 value rounds back to the recorded decimal places: float32.
+    - Everything else stays float64.
+
+    Parameters:
+    - parquet_file: pyarrow ParquetFile of the raw file.
+    - float64_channels: Channels that keep their float64 type.
+
+    Returns:
+    - pyarrow schema for the compacted file.
+    """
+    schema = parquet_file.schema_arrow
+    stats = {
+        field.name: {'count': 0, 'integral': True, 'flag': True, 'decimals': 0, 'float32_error': 0.0}
+        for field in schema if pa.types.is_floating(field.type) and field.name not in float64_channels
+    }
+    for batch in parquet_file.iter_batches(batch_size=CHUNK_ROWS, columns=list(stats)):
+        for name, column in zip(batch.schema.names, batch.columns):
+            values = column.to_numpy(zero_copy_only=False).astype(np.float64)
+            values = values[~np.isnan(values)]
+            if len(values) == 0:
+                continue
+            column_stats = stats[name]
+            column_stats['count'] += len(values)
+            column_stats['integral'] &= bool(np.all(values == np.round(values)))
+            column_stats['flag'] &= bool(np.all((values == 0) | (values == 1)))
+            if column_stats['decimals'] is not None:
+                decimals = _decimal_places(values)
+                column_stats['decimals'] = None if decimals is None else max(column_stats['decimals'], decimals)
+            with np.errstate(over='ignore', invalid='ignore'):
+                float32_error = np.max(np.abs(values - values.astype(np.float32).astype(np.float64)))
+            column_stats['float32_error'] = max(column_stats['float32_error'], float(float32_error))
+
+    for name, column_stats in stats.items():
+        if column_stats['count'] == 0:
+            new_type = pa.float32()
+        elif name.startswith('Czas [ms]') and column_stats['integral']:
+            new_type = pa.int64()
+        elif column_stats['flag']:
+            new_type = pa.uint8()
+        elif column_stats['decimals'] is not None and column_stats['float32_error'] < 0.5 * 10.0 ** -column_stats['decimals']:
+            new_type = pa.float32()
+        else:
+            continue
+        index = schema.get_field_index(name)
+        schema = schema.set(index, schema.field(index).with_type(new_type))
+    return schema
+
+def compact_parquet(source_path, target_path):
+    """
+    Rewrites a raw parquet file with the compact column types of compact_schema, row group by row group.
+
+    Parameters:
+    - source_path: Path to the float64 parquet file.
+    - target_path: Path to the compacted parquet file.
+
+    Returns:
+    - The compact schema.
+    """
+    parquet_file = pq.ParquetFile(source_path)
+    schema = compact_schema(parquet_file)
+    with pq.ParquetWriter(target_path, schema) as writer:
+        for batch in parquet_file.iter_batches(batch_size=CHUNK_ROWS):
+            arrays = []
+            for field, column in zip(schema, batch.columns):
+                if pa.types.is_integer(field.type) and pa.types.is_floating(column.type):
+                    # NaN is stored as null in the integer columns
+                    column = pa.array(column.to_numpy(zero_copy_only=False), from_pandas=True)
+                arrays.append(column.cast(field.type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return schema
+
+class _ChunkTypeMismatch(Exception):
+    """
+    A later CSV chunk has values that do not fit the column types inferred from the first chunk.
+    """
+
+    def __init__(self, columns):
+        super().__init__(f"Columns with values that do not fit the first chunk: {columns}")
+        self.columns = columns
+
+def _mismatched_columns(table: pa.Table, schema: pa.Schema, raw_names: list) -> list:
+    """
+    Raw (CSV) names of the columns of a chunk that cannot be cast to the schema.
+    """
+    columns = []
+    for raw_name, column, field in zip(raw_names, table.columns, schema):
+        try:
+            column.cast(field.type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            columns.append(raw_name)
+    return columns
+
+def _write_csv_chunks(csv_file_path, tmp_file_path, delimiter, encoding, chunk_rows, text_columns):
+    """
+    Writes the chunks of a CSV file as row groups of one parquet file. The text_columns are read as text.
+
+    Returns:
+    - Number of rows written (None if the file has no data rows).
+    """
+    rows = 0
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_file_path, delimiter=delimiter, encoding=encoding, chunksize=chunk_rows,
+                                 dtype={col: str for col in text_columns}):
+            raw_names = list(chunk.columns)
+            chunk.columns = [fix_encoding(col) for col in deduplicate_columns(chunk.columns)]
+            if writer is None:
+                schema = chunk_schema(chunk)
+                writer = pq.ParquetWriter(tmp_file_path, schema)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            try:
+                table = table.cast(schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                raise _ChunkTypeMismatch(_mismatched_columns(table, schema, raw_names))
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows if writer is not None else None
 
+def convert_csv_to_parquet(csv_file_path, output_file_path, delimiter=';', encoding=None, chunk_rows=CHUNK_ROWS,
+                           compact=False):
+    """
+    Converts one CSV file to parquet in chunks, writing one row group per chunk.
+    Column names are stored already fixed with fix_encoding, so the loaders can skip the fix-up.
+
+    The column types come from the first chunk. If a later chunk has text in a column that was
+    numeric so far, the file is converted again with that column read as text (like a
+    whole-file read_csv would type it).
+
+    Parameters:
+    - csv_file_path: Path to the CSV file.
+    - output_file_path: Path to the parquet file.
+    - delimiter: CSV delimiter.
+    - encoding: CSV encoding (detected if None).
+    - chunk_rows: Number of rows read per chunk.
+    - compact: Store the columns with the compact types of compact_schema (opt-in; the default
+               float64 files give exactly the results of the pipeline).
+
+    Returns:
+    - Number of rows written.
+    """
+    if encoding is None:
+        encoding = detect_encoding(csv_file_path)
+
+    tmp_file_path = f"{output_file_path}.tmp"
+    text_columns = set()
+    while True:
+        try:
+            rows = _write_csv_chunks(csv_file_path, tmp_file_path, delimiter, encoding, chunk_rows, text_columns)
+            break
+        except _ChunkTypeMismatch as e:
+            if set(e.columns) <= text_columns:
+                raise
+            logging.warning(f"{os.path.basename(csv_file_path)}: {e}. Converting again with these columns as text.")
+            text_columns |= set(e.columns)
+
+    if rows is None:
+        # Header only: keep the columns of the empty file
+        df = pd.read_csv(csv_file_path, delimiter=delimiter, encoding=encoding)
+        df.columns = [fix_encoding(col) for col in deduplicate_columns(df.columns)]
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table.replace_schema_metadata({COLUMN_NAMES_FIXED_METADATA_KEY: 'true'}), tmp_file_path)
+        rows = 0
+
+    if compact:
+        compact_file_path = f"{output_file_path}.compact.tmp"
+        compact_parquet(tmp_file_path, compact_file_path)
+        os.remove(tmp_file_path)
+        tmp_file_path = compact_file_path
+    os.replace(tmp_file_path, output_file_path)
+    return rows
+
+def find_csv_jobs(source_dir, target_dir):
+    """
+    Lists the CSV files of the archive with the parquet path they are converted to.
+
+    Parameters:
+    - source_dir: Folder with one subfolder per month (e.g. '2014-11').
+    - target_dir: Folder of the parquet files.
+
+    Returns:
+    - List of (csv_file_path, output_file_path) tuples.
+    """
+    jobs = []
     for root, _, files in os.walk(source_dir):
         for file in files:
             if file.endswith('.csv'):
                 csv_file_path = os.path.join(root, file)
-                
-                detected_delimiter = detect_delimiter(csv_file_path)
-                print(f"File: {file}. Detected delimiter: {detected_delimiter}")
-
-                # Detect encoding
-                encoding = detect_encoding(csv_file_path)
-                #df = pd.read_csv(csv_file_path, sep=None, engine='python', encoding=encoding)
-                #df = pd.read_csv(csv_file_path, sep='[;,]', engine='python', encoding=encoding)
-                df = pd.read_csv(csv_file_path, delimiter=';', encoding=encoding)
-                #df = pd.read_csv(csv_file_path, delimiter=detect_delimiter, encoding=encoding)
-
-                # Log file name and DataFrame columns
-                #logging.info(f"Processing file: {csv_file_path}")
-                #logging.info(f"Columns in DataFrame: {df.columns.tolist()}")
-
-                # Deduplicate column names
-                def deduplicate_columns(columns):
-                    counts = {}
-                    new_columns = []
-                    for col in columns:
-                        if col in counts:
-                            counts[col] += 1
-                            new_columns.append(f"{col}_{counts[col]}")
-                        else:
-                            counts[col] = 0
-                            new_columns.append(col)
-                    return new_columns
-
-                df.columns = deduplicate_columns(df.columns)
 
                 # Extract folder name (e.g., '2014-11')
                 folder_name = os.path.basename(os.path.dirname(csv_file_path))
@@ -66,10 +276,68 @@ def transform_csv_to_parquet():
                 # Construct output file name
                 base_filename = os.path.splitext(file)[0]
                 output_filename = f"{base_filename} - {folder_name}.parquet"
-                output_file_path = os.path.join(target_dir, output_filename)
+                jobs.append((csv_file_path, os.path.join(target_dir, output_filename)))
+    return jobs
+
+def convert_job(csv_file_path, output_file_path, chunk_rows=CHUNK_ROWS, compact=False):
+    """
+    Converts one file of the archive; errors are returned instead of raised, so one
+    broken export does not stop the others.
+
+    Returns:
+    - Dictionary with 'file', 'rows', 'seconds' and 'error' (None on success).
+    """
+    start_time = time.perf_counter()
+    result = {'file': csv_file_path, 'rows': 0, 'seconds': 0.0, 'error': None}
+    try:
+        # Detect encoding once and reuse it for the delimiter sniffing and the reading
+        encoding = detect_encoding(csv_file_path)
+        detected_delimiter = detect_delimiter(csv_file_path, encoding=encoding)
+        print(f"File: {os.path.basename(csv_file_path)}. Detected delimiter: {detected_delimiter}")
+
+        # The bench exports are ';'-separated (the sniffer may pick ',' from the commas in the column names)
+        result['rows'] = convert_csv_to_parquet(csv_file_path, output_file_path, delimiter=';',
+                                                encoding=encoding, chunk_rows=chunk_rows, compact=compact)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start_time
+    return result
+
+def transform_csv_to_parquet(chunk_rows=CHUNK_ROWS, workers=1, compact=False):
+    source_dir = os.path.join(RAW_DATA_DIR, 'all_csv')
+    target_dir = os.path.join(RAW_DATA_DIR, 'parquet_files')
+
+    if not os.path.exists(target_dir):
+        os.makedirs(target_dir)
+
+    jobs = find_csv_jobs(source_dir, target_dir)
+    start_time = time.perf_counter()
+    results = []
+
+    def report(result):
+        results.append(result)
+        status = f"failed: {result['error']}" if result['error'] else f"{result['rows']} rows"
+        logging.info(f"[{len(results)}/{len(jobs)}] {result['file']} ({result['seconds']:.1f} s) {status}")
+
+    if workers <= 1:
+        for csv_file_path, output_file_path in jobs:
+            report(convert_job(csv_file_path, output_file_path, chunk_rows, compact))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(convert_job, csv_file_path, output_file_path, chunk_rows, compact)
+                       for csv_file_path, output_file_path in jobs]
+            for future in as_completed(futures):
+                report(future.result())
 
-                # Save DataFrame as .parquet file
-                df.to_parquet(output_file_path)
+    failed = [result for result in results if result['error']]
+    logging.info(
+        f"Converted {len(results) - len(failed)}/{len(jobs)} files "
+        f"({sum(result['rows'] for result in results)} rows) in {time.perf_counter() - start_time:.1f} s "
+        f"with {workers} worker(s)."
+    )
+    for result in failed:
+        logging.error(f"Failed: {result['file']} - {result['error']}")
+    return results
 
 if __name__ == '__main__':
     # For Python 3.9 and above
@@ -85,4 +353,13 @@ if __name__ == '__main__':
     # logger.addHandler(handler)
     # logger.setLevel(logging.INFO)
 
-    transform_csv_to_parquet()
+    parser = argparse.ArgumentParser(description="Convert the raw CSV archive to parquet files.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes (1 = serial run).")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help="Number of CSV rows read per chunk.")
+    parser.add_argument('--compact', action='store_true',
+                        help="Store compact column types (int64 time, uint8 flags, float32 for the channels "
+                             "that are not used by the stable detectors).")
+    args = parser.parse_args()
+    transform_csv_to_parquet(chunk_rows=args.chunk_rows, workers=args.workers, compact=args.compact)
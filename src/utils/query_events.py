@@ -0,0 +1,107 @@
+import argparse
+import glob
+import json
+import os
+import pandas as pd
+from tabulate import tabulate
+from src.config import LOGS_DIR
+
+
+EVENT_COLUMNS = ['time', 'run_id', 'file_id', 'step', 'event']
+STEP_COLUMNS = ['file_id', 'file_name', 'fuel', 'step', 'status', 'rows_in', 'rows_out', 'rows_lost', 'wall_s', 'cpu_s']
+
+
+def list_runs(logs_dir: str = LOGS_DIR, include_empty: bool = False) -> list:
+    """
+    Run ids with a structured events file (events_<run id>.jsonl), oldest first.
+
+    Parameters:
+    - logs_dir: Folder of the log files.
+    - include_empty: Also return the runs whose events file is empty (e.g. a run that stopped before its first event).
+    """
+    runs = []
+    for f in sorted(glob.glob(os.path.join(logs_dir, 'events_*.jsonl'))):
+        if not include_empty and os.path.getsize(f) == 0:
+            print(f"Events file {os.path.basename(f)} is empty. Skipping.")
+            continue
+        runs.append(os.path.basename(f)[len('events_'):-len('.jsonl')])
+    return runs
+
+
+def load_events(run_id: str = None, logs_dir: str = LOGS_DIR) -> pd.DataFrame:
+    """
+    Load the structured events of a run into a DataFrame.
+
+    Parameters:
+    - run_id: Run id (time stamp of the log file, e.g. '2024-05-01_10-00-00'); None = the latest run with events.
+    - logs_dir: Folder of the log files.
+
+    Returns:
+    - DataFrame with one row per event (time, run_id, file_id, step, event and the event fields);
+      a run without events gives an empty DataFrame with the columns time, run_id, file_id, step and event.
+    """
+    if run_id is None:
+        runs = list_runs(logs_dir)
+        if not runs:
+            raise FileNotFoundError(f"No non-empty events files found in {logs_dir}.")
+        run_id = runs[-1]
+    file_path = os.path.join(logs_dir, f'events_{run_id}.jsonl')
+    with open(file_path, 'r', encoding='utf-8') as f:
+        events = pd.DataFrame([json.loads(line) for line in f if line.strip()])
+    for column in EVENT_COLUMNS:
+        if column not in events.columns:
+            events[column] = pd.Series(dtype=object)
+    events['time'] = pd.to_datetime(events['time'])
+    return events
+
+
+def step_table(events: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per file and pipeline step with the rows in/out, the rows lost and the timings.
+    """
+    steps = events[events['event'] == 'step']
+    if steps.empty:
+        return pd.DataFrame(columns=STEP_COLUMNS)
+    steps = steps.copy()
+    steps['rows_lost'] = steps['rows_in'] - steps['rows_out']
+    return steps[[column for column in STEP_COLUMNS if column in steps.columns]].reset_index(drop=True)
+
+
+def rows_lost_in_step(events: pd.DataFrame, step: str = 'stable_detection', top: int = None) -> pd.DataFrame:
+    """
+    Files sorted by the rows lost in one pipeline step (e.g. "which files lost the most rows in stable filtering").
+
+    Parameters:
+    - events: Events of a run (see load_events).
+    - step: Name of the pipeline step.
+    - top: Number of files to return (None = all).
+
+    Returns:
+    - DataFrame with file_id, file_name, fuel, rows_in, rows_out, rows_lost and kept_share
+      (empty if the run has no events of the step).
+    """
+    steps = step_table(events)
+    lost = steps[steps['step'] == step].drop(columns=['step'])
+    lost['kept_share'] = lost['rows_out'] / lost['rows_in']
+    lost = lost.sort_values('rows_lost', ascending=False).reset_index(drop=True)
+    return lost.head(top) if top else lost
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Query the structured events of a pipeline run.")
+    parser.add_argument('--run', default=None, help="Run id (default: the latest run).")
+    parser.add_argument('--logs-dir', default=LOGS_DIR, help="Folder of the log files.")
+    parser.add_argument('--step', default='stable_detection', help="Step of the rows lost ranking.")
+    parser.add_argument('--top', type=int, default=10, help="Number of files to show.")
+    parser.add_argument('--event', default=None, help="Show all events of this type instead (e.g. 'error').")
+    args = parser.parse_args()
+
+    events = load_events(args.run, args.logs_dir)
+    if args.event:
+        table = events[events['event'] == args.event].dropna(axis=1, how='all')
+    else:
+        table = rows_lost_in_step(events, args.step, args.top)
+    if table.empty:
+        print("No matching events in this run.")
+    else:
+        print(tabulate(table, headers='keys', tablefmt='grid', showindex=False))
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def window_starts(times: np.ndarray, window) -> np.ndarray:
+    """
+    First index of the trailing time window of every sample, with the same bounds as
+    pandas time-based rolling: (t - window, t].
+
+    Parameters:
+    - times: Sorted datetime64 values.
+    - window: Window length, e.g. '8000ms' or a Timedelta.
+
+    Returns:
+    - int64 array of start indices.
+    """
+    time_ns = np.asarray(times).astype('datetime64[ns]').astype(np.int64)
+    return np.searchsorted(time_ns, time_ns - pd.Timedelta(window).value, side='right').astype(np.int64)
+
+
+def rolling_range(times: np.ndarray, columns: Dict[str, np.ndarray], window) -> Dict[str, np.ndarray]:
+    """
+    Rolling max - min of several channels over one shared time index, the same as
+    Series.rolling(window, min_periods=1).max() - .min() (NaN values are ignored;
+    a window without values gives NaN).
+
+    The window bounds are computed once for all channels. With numba installed every channel
+    is one O(n) monotonic-deque pass; otherwise a vectorized NumPy sparse table is used.
+
+    Parameters:
+    - times: Sorted datetime64 values.
+    - columns: {channel name: values}.
+    - window: Window length, e.g. '8000ms'.
+
+    Returns:
+    - {channel name: float64 array of max - min}.
+    """
+    starts = window_starts(times, window)
+    kernel = _deque_range if NUMBA_AVAILABLE else _sparse_table_range
+    return {name: kernel(np.asarray(values, dtype=np.float64), starts) for name, values in columns.items()}
+
+
+def _sparse_table_range(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Range max - min over [starts[i], i] with a sparse table of powers of two
+    (every query is answered by two overlapping blocks).
+    """
+    n = len(values)
+    if n == 0:
+        return np.empty(0)
+    ends = np.arange(n)
+    lengths = ends - starts + 1
+    levels = np.floor(np.log2(lengths)).astype(np.int64)
+
+    range_max = np.empty(n)
+    range_min = np.empty(n)
+    level_max = values
+    level_min = values
+    level = 0
+    while True:
+        queries = np.flatnonzero(levels == level)
+        if len(queries):
+            span = 1 << level
+            left = starts[queries]
+            right = ends[queries] - span + 1
+            range_max[queries] = np.fmax(level_max[left], level_max[right])
+            range_min[queries] = np.fmin(level_min[left], level_min[right])
+        span = 1 << level
+        if 2 * span > lengths.max():
+            break
+        # Level k + 1 covers [j, j + 2^(k+1)) as two blocks of level k
+        level_max = np.fmax(level_max[:-span], level_max[span:])
+        level_min = np.fmin(level_min[:-span], level_min[span:])
+        level += 1
+    return range_max - range_min
+
+
+def _deque_range(values, starts):
+    """
+    Range max - min over [starts[i], i] with monotonic deques (indices stored in preallocated arrays).
+    Compiled with numba when it is installed; the plain function stays testable without it.
+    """
+    n = len(values)
+    result = np.empty(n)
+    max_deque = np.empty(n, dtype=np.int64)
+    min_deque = np.empty(n, dtype=np.int64)
+    max_head, max_tail, min_head, min_tail = 0, 0, 0, 0
+    for i in range(n):
+        value = values[i]
+        if not np.isnan(value):
+            while max_tail > max_head and values[max_deque[max_tail - 1]] <= value:
+                max_tail -= 1
+            max_deque[max_tail] = i
+            max_tail += 1
+            while min_tail > min_head and values[min_deque[min_tail - 1]] >= value:
+                min_tail -= 1
+            min_deque[min_tail] = i
+            min_tail += 1
+        # Drop the samples that left the window
+        while max_tail > max_head and max_deque[max_head] < starts[i]:
+            max_head += 1
+        while min_tail > min_head and min_deque[min_head] < starts[i]:
+            min_head += 1
+        if max_tail > max_head:
+            result[i] = values[max_deque[max_head]] - values[min_deque[min_head]]
+        else:
+            result[i] = np.nan
+    return result
+
+
+if NUMBA_AVAILABLE:
+    _deque_range = njit(cache=True)(_deque_range)
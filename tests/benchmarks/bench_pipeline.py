@@ -0,0 +1,304 @@
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+import pandas as pd
+from tabulate import tabulate
+import main_all_files
+from src.data_filter import DataFilter
+from src.data_loader import DataLoader
+from src.data_transformation import DataTransformation
+from src.log_manager import LogManager
+from src.metadata_manager import MetadataManager
+from tests.benchmarks.synthetic_recordings import synthetic_recording
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_SIZES = [15000, 60000, 240000]  # rows of the 20 ms channels (~5, 20 and 80 minutes of recording)
+REGRESSION_TOLERANCE = 0.2  # Slower by more than 20 % = regression
+RAW_FILE_NAME = 'synthetic - 2024-01.parquet'
+
+
+def git_commit() -> str:
+    """
+    Short hash of the current commit ('+dirty' if there are uncommitted changes), or 'unknown'.
+    """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], text=True).strip()
+        return f"{commit}+dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def time_call(setup, func, repeat: int) -> list:
+    """
+    Wall time of func(setup()) in seconds for every repetition (setup is not timed).
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+class PipelineBenchmark:
+    """
+    Times the pipeline stages on a synthetic raw recording of a given size.
+    """
+
+    def __init__(self, rows: int, work_dir: str, log_manager: LogManager):
+        """
+        Initialize the PipelineBenchmark and write the synthetic raw file and its catalog.
+
+        Parameters:
+        - rows: Number of rows of the synthetic recording.
+        - work_dir: Folder for the raw file, catalog, outputs and metadata.
+        - log_manager: An instance of LogManager for the pipeline logs.
+        """
+        self.rows = rows
+        self.work_dir = work_dir
+        self.log_manager = log_manager
+        self.required_columns = main_all_files.required_columns_for_validation_step
+        self.raw_dir = os.path.join(work_dir, 'raw')
+        os.makedirs(self.raw_dir, exist_ok=True)
+        os.makedirs(os.path.join(work_dir, 'metadata'), exist_ok=True)
+        synthetic_recording(rows, self.required_columns).to_parquet(os.path.join(self.raw_dir, RAW_FILE_NAME), index=False)
+        self.item = {'id': 1, 'main_file_name': RAW_FILE_NAME, 'eco_file_name': 'empty', 'fuel': 'DF',
+                     'test_date': '2024-01'}
+        self.names_of_files_under_procession = [RAW_FILE_NAME, 'empty', 'DF']
+        self.metadata_manager = MetadataManager(metadata_dir=os.path.join(work_dir, 'metadata'),
+                                                names_of_files_under_procession=[], buffered=True)
+        self.catalog_path = os.path.join(work_dir, 'catalog.json')
+        with open(self.catalog_path, 'w', encoding='utf-8') as f:
+            json.dump({'Lublin Diesel': [self.item]}, f)
+
+    def _load(self) -> pd.DataFrame:
+        data_loader = DataLoader(raw_data_path=self.raw_dir,
+                                 names_of_files_under_procession=self.names_of_files_under_procession,
+                                 metadata_manager=self.metadata_manager, log_manager=self.log_manager)
+        return data_loader.load_data(RAW_FILE_NAME, columns=self.required_columns)
+
+    def _data_filter(self, df: pd.DataFrame) -> DataFilter:
+        return DataFilter(df=df, required_columns=self.required_columns,
+                          names_of_files_under_procession=self.names_of_files_under_procession,
+                          metadata_manager=self.metadata_manager, log_manager=self.log_manager)
+
+    def _synchronized_filter(self) -> DataFilter:
+        data_filter = self._data_filter(self._load())
+        data_filter.filter_columns()
+        data_filter.synchronize_time()
+        return data_filter
+
+    def _stable_df(self) -> pd.DataFrame:
+        data_filter = self._synchronized_filter()
+        data_filter.filter_all_stable_periods()
+        return data_filter.delete_fuel_column_avr_or_current()
+
+    def _process_file(self, _) -> None:
+        if not main_all_files.process_file(self.item, self.metadata_manager, self.log_manager):
+            raise RuntimeError("process_file failed on the synthetic recording, see the benchmark log.")
+
+    def cases(self) -> dict:
+        """
+        {benchmark name: (setup, timed function)}.
+        """
+        return {
+            'DataLoader.load_data': (lambda: None, lambda _: self._load()),
+            'DataFilter.synchronize_time': (
+                lambda: self._data_filter(self._load()),
+                lambda data_filter: (data_filter.filter_columns(), data_filter.synchronize_time())
+            ),
+            'DataFilter.filter_all_stable_periods': (
+                self._synchronized_filter, lambda data_filter: data_filter.filter_all_stable_periods()
+            ),
+            'DataTransformation.atmospheric_power_correction': (
+                lambda: DataTransformation(df=self._stable_df(),
+                                           names_of_files_under_procession=self.names_of_files_under_procession,
+                                           metadata_manager=self.metadata_manager, log_manager=self.log_manager),
+                lambda transformation: transformation.atmospheric_power_correction(show_corrections=True)
+            ),
+            'process_file': (lambda: None, self._process_file),
+        }
+
+    def run(self, repeat: int, selected: list = None) -> list:
+        """
+        Run the benchmarks.
+
+        Parameters:
+        - repeat: Number of repetitions (the median and the minimum are reported).
+        - selected: Names of the benchmarks to run (None = all).
+
+        Returns:
+        - List of {'benchmark', 'rows', 'median_s', 'min_s', 'rows_per_s', 'timings_s'}.
+        """
+        results = []
+        for name, (setup, func) in self.cases().items():
+            if selected and name not in selected:
+                continue
+            timings = time_call(setup, func, repeat)
+            median_s = statistics.median(timings)
+            results.append({
+                'benchmark': name,
+                'rows': self.rows,
+                'median_s': median_s,
+                'min_s': min(timings),
+                'rows_per_s': self.rows / median_s if median_s else None,
+                'timings_s': timings,
+            })
+        return results
+
+
+def _patched_pipeline_paths(benchmark: PipelineBenchmark) -> dict:
+    """
+    Point the module-level paths of main_all_files at the benchmark folder; returns the previous values.
+    """
+    paths = {
+        'RAW_PARQUET_DATA_DIR': benchmark.raw_dir,
+        'PROCESSED_DATA_WITH_FUELS_FILE_DIR': os.path.join(benchmark.work_dir, 'processed'),
+        'json_path': benchmark.catalog_path,
+    }
+    os.makedirs(paths['PROCESSED_DATA_WITH_FUELS_FILE_DIR'], exist_ok=True)
+    previous = {name: getattr(main_all_files, name) for name in paths}
+    for name, value in paths.items():
+        setattr(main_all_files, name, value)
+    return previous
+
+
+def run_benchmarks(sizes: list = None, repeat: int = 3, selected: list = None) -> dict:
+    """
+    Run all benchmarks for every data size.
+
+    Parameters:
+    - sizes: Row counts of the synthetic recordings (default DEFAULT_SIZES).
+    - repeat: Number of repetitions per benchmark.
+    - selected: Names of the benchmarks to run (None = all).
+
+    Returns:
+    - Dictionary with 'commit', 'date', 'environment' and 'results'.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    results = []
+    with tempfile.TemporaryDirectory(prefix='dt_engine_bench_') as work_dir:
+        log_manager = LogManager(logs_dir=os.path.join(work_dir, 'logs'), names_of_files_under_procession=[])
+        try:
+            for rows in sizes:
+                benchmark = PipelineBenchmark(rows, os.path.join(work_dir, str(rows)), log_manager)
+                previous = _patched_pipeline_paths(benchmark)
+                try:
+                    results += benchmark.run(repeat, selected)
+                finally:
+                    for name, value in previous.items():
+                        setattr(main_all_files, name, value)
+        finally:
+            log_manager.close()
+    return {
+        'commit': git_commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def save_results(run: dict, results_dir: str = RESULTS_DIR) -> str:
+    """
+    Save one benchmark run as results/<date>_<commit>.json.
+
+    Returns:
+    - Path of the saved file.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    date = run['date'].replace(':', '-').replace('T', '_')
+    file_path = os.path.join(results_dir, f"{date}_{run['commit']}.json")
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=4)
+    return file_path
+
+
+def latest_results(results_dir: str = RESULTS_DIR, exclude: str = None):
+    """
+    The most recent saved run (other than exclude), or None.
+    """
+    files = [f for f in sorted(glob.glob(os.path.join(results_dir, '*.json'))) if f != exclude]
+    if not files:
+        return None
+    with open(files[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_runs(current: dict, baseline: dict, tolerance: float = REGRESSION_TOLERANCE) -> pd.DataFrame:
+    """
+    Median time of every benchmark/size of the current run relative to the baseline run.
+
+    Returns:
+    - DataFrame with benchmark, rows, baseline_s, current_s, ratio and 'regression' (ratio > 1 + tolerance).
+    """
+    baseline_times = {(r['benchmark'], r['rows']): r['median_s'] for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        key = (result['benchmark'], result['rows'])
+        if key not in baseline_times:
+            continue
+        ratio = result['median_s'] / baseline_times[key]
+        rows.append({
+            'benchmark': result['benchmark'],
+            'rows': result['rows'],
+            'baseline_s': baseline_times[key],
+            'current_s': result['median_s'],
+            'ratio': ratio,
+            'regression': ratio > 1 + tolerance,
+        })
+    return pd.DataFrame(rows)
+
+
+def main(sizes: list = None, repeat: int = 3, selected: list = None, save: bool = True,
+         tolerance: float = REGRESSION_TOLERANCE) -> int:
+    run = run_benchmarks(sizes, repeat, selected)
+    results_df = pd.DataFrame(run['results']).drop(columns='timings_s')
+    print(f"Commit {run['commit']}, {run['repeat']} repetitions:")
+    print(tabulate(results_df, headers='keys', tablefmt='grid', showindex=False, floatfmt='.4f'))
+
+    saved_path = save_results(run) if save else None
+    if saved_path:
+        print(f"Results saved to {saved_path}")
+
+    baseline = latest_results(exclude=saved_path)
+    if baseline is None:
+        print("No earlier results to compare with.")
+        return 0
+    comparison = compare_runs(run, baseline, tolerance)
+    print(f"Compared with commit {baseline['commit']} ({baseline['date']}):")
+    print(tabulate(comparison, headers='keys', tablefmt='grid', showindex=False, floatfmt='.4f'))
+    regressions = int(comparison['regression'].sum()) if not comparison.empty else 0
+    if regressions:
+        print(f"{regressions} benchmarks are more than {tolerance:.0%} slower.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline on synthetic bench recordings.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Rows of the synthetic recordings (20 ms samples).")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions per benchmark.")
+    parser.add_argument('--benchmark', action='append', dest='selected',
+                        help="Run only this benchmark (can be repeated).")
+    parser.add_argument('--no-save', action='store_true', help="Do not store the results.")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help="Relative slowdown reported as a regression (0.2 = 20 %%).")
+    args = parser.parse_args()
+    sys.exit(main(args.sizes, args.repeat, args.selected, not args.no_save, args.tolerance))
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# Sampling period of the channels in the bench exports (ms); every other channel is sampled every 200 ms
+FAST_CHANNELS = {'Obroty[obr/min]': 20, 'Moment obrotowy[Nm]': 20}
+SLOW_CHANNELS = {'Ciśnienie atmosferyczne[hPa]': 1000, 'Temp. otoczenia[°C]': 1000, 'Wilgotność względna[%]': 1000}
+DEFAULT_PERIOD_MS = 200
+
+# Level (mean, noise std) of the channels that do not follow the operating point
+STATIC_LEVELS = {
+    'Ciśnienie atmosferyczne[hPa]': (1001.9, 0.3),
+    'Temp. otoczenia[°C]': (23.8, 0.05),
+    'Wilgotność względna[%]': (22.0, 0.0),
+    'ECT - wyjście z sil.[°C]': (69.6, 0.8),
+    'Temp. pal. na wyjściu sil.[°C]': (48.0, 0.8),
+    'Temp. powietrza za turb.[°C]': (31.7, 1.0),
+}
+
+# Operating points of the step profile: (rpm, torque [Nm]) held for hold_s, then ramped to the next one
+DEFAULT_OPERATING_POINTS = [(800, 20), (1200, 80), (1600, 150), (2000, 220), (2400, 180), (2800, 120)]
+
+
+def _step_profile(times_s: np.ndarray, levels: np.ndarray, hold_s: float, ramp_s: float) -> np.ndarray:
+    """
+    Holds every level for hold_s and ramps linearly to the next one in ramp_s (cyclic).
+    """
+    period_s = hold_s + ramp_s
+    step = (times_s // period_s).astype(np.int64)
+    phase = times_s - step * period_s
+    current = levels[step % len(levels)]
+    following = levels[(step + 1) % len(levels)]
+    ramp_fraction = np.clip((phase - hold_s) / ramp_s, 0.0, 1.0)
+    return current + (following - current) * ramp_fraction
+
+
+def _channel_values(name: str, times_s: np.ndarray, rpm: np.ndarray, torque: np.ndarray,
+                    rng: np.random.Generator) -> np.ndarray:
+    """
+    Values of one channel at its own sample times, derived from the operating point.
+    """
+    size = len(times_s)
+    if name == 'Obroty[obr/min]':
+        return np.round(rpm + rng.normal(0, 2, size))
+    if name == 'Moment obrotowy[Nm]':
+        return np.round(torque + rng.normal(0, 0.2, size), 1)
+    if name in ('Zużycie paliwa średnie[g/s]', 'Zużycie paliwa bieżące[g/s]'):
+        noise = 0.005 if name == 'Zużycie paliwa średnie[g/s]' else 0.05
+        return np.round(0.05 + rpm * torque * 2.2e-6 + rng.normal(0, noise, size), 4).clip(min=0)
+    if name == 'Moc[kW]':
+        return np.round(rpm * torque / 9549 + rng.normal(0, 0.1, size), 1)
+    if name == 'MAF[kg/h]':
+        return np.round(rpm * 0.12 + torque * 0.3 + rng.normal(0, 2, size), 1)
+    if name == 'Ciś. pow. za turb.[Pa]':
+        return np.round(2000 + torque * 40 + rng.normal(0, 50, size))
+    if name.startswith('Temp. spalin'):
+        return np.round(100 + torque * 2.0 + rpm * 0.05 + rng.normal(0, 3, size), 2)
+    if name == 'Temp. oleju w misce[°C]':
+        # Engine warm-up: 40 °C -> 95 °C
+        return np.round(40 + 55 * (1 - np.exp(-times_s / 600)) + rng.normal(0, 0.3, size))
+    if name in STATIC_LEVELS:
+        mean, std = STATIC_LEVELS[name]
+        return np.round(mean + rng.normal(0, std, size), 1)
+    return np.round(rng.normal(0, 1, size).cumsum() * 0.01, 3)
+
+
+def synthetic_recording(rows: int, channels: list, total_columns: int = 143,
+                        operating_points: list = None, hold_s: float = 60.0, ramp_s: float = 10.0,
+                        seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic raw bench recording laid out like the exports: every channel is preceded by its own
+    time column ('Czas [ms]', 'Czas [ms].1', ...), sampled at its own rate with a small phase offset
+    and jitter, and padded with NaN to the length of the fastest channels. rpm and torque follow a
+    step profile over the operating points, the other channels are derived from it.
+
+    Parameters:
+    - rows: Number of rows (samples of the fastest, 20 ms channels).
+    - channels: Channels that must be present (e.g. the required columns of the pipeline).
+    - total_columns: Number of columns; filled up with extra channels (the exports have ~140).
+    - operating_points: [(rpm, torque)] of the step profile (default: DEFAULT_OPERATING_POINTS).
+    - hold_s: Hold time of every operating point (s).
+    - ramp_s: Ramp time between the operating points (s).
+    - seed: Seed of the random noise.
+
+    Returns:
+    - DataFrame with total_columns columns and rows rows.
+    """
+    rng = np.random.default_rng(seed)
+    points = np.array(operating_points or DEFAULT_OPERATING_POINTS, dtype=float)
+    duration_ms = rows * min(FAST_CHANNELS.values())
+
+    channels = list(dict.fromkeys(channels))
+    extra_channels = max(0, (total_columns - 1) // 2 - len(channels))
+    channels += [f"Kanał {idx}[-]" for idx in range(extra_channels)]
+
+    data = {}
+    for idx, name in enumerate(channels):
+        period_ms = FAST_CHANNELS.get(name) or SLOW_CHANNELS.get(name) or DEFAULT_PERIOD_MS
+        offset_ms = rng.uniform(0, period_ms / 10)
+        times_ms = np.arange(0, duration_ms, period_ms) + offset_ms + rng.uniform(-1, 1, int(np.ceil(duration_ms / period_ms)))
+        times_ms = np.round(times_ms[:rows])
+        times_s = times_ms / 1000
+        rpm = _step_profile(times_s, points[:, 0], hold_s, ramp_s)
+        torque = _step_profile(times_s, points[:, 1], hold_s, ramp_s)
+        values = _channel_values(name, times_s, rpm, torque, rng)
+
+        time_column = 'Czas [ms]' if idx == 0 else f'Czas [ms].{idx}'
+        data[time_column] = np.pad(times_ms, (0, rows - len(times_ms)), constant_values=np.nan)
+        data[name] = np.pad(values.astype(float), (0, rows - len(values)), constant_values=np.nan)
+
+    df = pd.DataFrame(data)
+    # The exports end with an empty column
+    if len(df.columns) < total_columns:
+        df[f'Unnamed: {len(df.columns)}'] = np.nan
+    return df
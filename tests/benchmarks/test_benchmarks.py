@@ -0,0 +1,28 @@
+import main_all_files
+from tests.benchmarks.bench_pipeline import compare_runs, run_benchmarks
+from tests.benchmarks.synthetic_recordings import synthetic_recording
+
+
+def test_synthetic_recording_layout():
+    """
+    Test that the synthetic recording is laid out like the bench exports.
+    """
+    df = synthetic_recording(3000, main_all_files.required_columns_for_validation_step)
+    assert df.shape == (3000, 143)
+    assert list(df.columns[:4]) == ['Czas [ms]', 'Ciś. pow. za turb.[Pa]', 'Czas [ms].1', 'Ciśnienie atmosferyczne[hPa]']
+    # 20 ms rpm samples fill every row, 200 ms channels a tenth of them
+    assert df['Obroty[obr/min]'].notna().sum() == 3000
+    assert df['MAF[kg/h]'].notna().sum() == 300
+
+
+def test_benchmark_run_and_comparison():
+    """
+    Smoke test of the benchmark harness on a tiny recording, and the regression flag of the comparison.
+    """
+    run = run_benchmarks(sizes=[3000], repeat=1, selected=['DataFilter.filter_all_stable_periods', 'process_file'])
+    assert [result['benchmark'] for result in run['results']] == ['DataFilter.filter_all_stable_periods', 'process_file']
+    assert all(result['median_s'] > 0 for result in run['results'])
+
+    slower = {'results': [dict(result, median_s=result['median_s'] * 2) for result in run['results']]}
+    assert compare_runs(slower, run)['regression'].all()
+    assert not compare_runs(run, run)['regression'].any()
@@ -0,0 +1,17 @@
+import pandas as pd
+from src.arrow_store import open_arrow, open_arrow_files, save_arrow
+
+
+def test_arrow_copies_open_memory_mapped(tmp_path):
+    """
+    Test that Arrow IPC copies round-trip and open as one table across files with differing fuel property types.
+    """
+    first = pd.DataFrame({'RPM': [800.0, 1200.0], 'Cetane number': [51, 51]})
+    second = pd.DataFrame({'RPM': [1600.0], 'Cetane number': [59.2]})
+    save_arrow(first, str(tmp_path / 'first.arrow'))
+    save_arrow(second, str(tmp_path / 'second.arrow'))
+
+    pd.testing.assert_frame_equal(open_arrow(str(tmp_path / 'first.arrow')).to_pandas(), first)
+    combined = open_arrow_files([str(tmp_path / 'first.arrow'), str(tmp_path / 'second.arrow')])
+    assert combined.num_rows == 3
+    assert combined.column('Cetane number').to_pylist() == [51.0, 51.0, 59.2]
@@ -0,0 +1,49 @@
+import pandas as pd
+from src.build_manifest import BuildManifest, pipeline_code_hash
+
+
+def test_build_manifest_detects_changed_inputs(tmp_path):
+    """
+    Test that an item is up to date only while its raw file, fuel record and parameters are unchanged.
+    """
+    manifest_path = str(tmp_path / 'build_manifest.json')
+    raw_file_path = str(tmp_path / 'raw.parquet')
+    pd.DataFrame({'Czas [ms]': [0.0, 100.0], 'Obroty[obr/min]': [800.0, 801.0]}).to_parquet(raw_file_path, index=False)
+    output_path = tmp_path / 'raw_tr_f.parquet'
+    output_path.write_bytes(b'')
+    parameters = {'stable_rules': {'Obroty[obr/min]': (20, '8000ms')}}
+
+    manifest = BuildManifest(manifest_path)
+    raw_file = manifest.file_hash('raw.parquet', raw_file_path)
+    fingerprint = BuildManifest.fingerprint(raw_file, {'short_name': 'DF'}, parameters)
+    manifest.record('raw.parquet', fingerprint, raw_file, str(output_path))
+    manifest.save()
+
+    manifest = BuildManifest(manifest_path)
+    raw_file = manifest.file_hash('raw.parquet', raw_file_path)
+    assert manifest.is_up_to_date('raw.parquet', BuildManifest.fingerprint(raw_file, {'short_name': 'DF'}, parameters),
+                                  str(output_path))
+    assert not manifest.is_up_to_date('raw.parquet', BuildManifest.fingerprint(raw_file, {'short_name': 'RME'}, parameters),
+                                      str(output_path)), "A changed fuel record should trigger a rebuild."
+
+    pd.DataFrame({'Czas [ms]': [0.0]}).to_parquet(raw_file_path, index=False)
+    changed_raw_file = manifest.file_hash('raw.parquet', raw_file_path)
+    assert not manifest.is_up_to_date('raw.parquet', BuildManifest.fingerprint(changed_raw_file, {'short_name': 'DF'}, parameters),
+                                      str(output_path)), "A changed raw file should trigger a rebuild."
+
+
+def test_pipeline_code_hash_changes_with_the_sources(tmp_path):
+    """
+    Test that editing or adding a pipeline source file changes the code hash and so the fingerprint.
+    """
+    (tmp_path / 'stage.py').write_text("THRESHOLD = 0.1\n")
+    raw_file = {'sha256': 'raw'}
+    code_hash = pipeline_code_hash([str(tmp_path)])
+    fingerprint = BuildManifest.fingerprint(raw_file, {'short_name': 'DF'}, {}, code_hash)
+
+    (tmp_path / 'stage.py').write_text("THRESHOLD = 0.2\n")
+    assert pipeline_code_hash([str(tmp_path)]) != code_hash
+    assert BuildManifest.fingerprint(raw_file, {'short_name': 'DF'}, {}, pipeline_code_hash([str(tmp_path)])) != fingerprint
+    edited_hash = pipeline_code_hash([str(tmp_path)])
+    (tmp_path / 'new_stage.py').write_text("")
+    assert pipeline_code_hash([str(tmp_path)]) != edited_hash
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from src.column_profile import approx_distinct_counts
+from src.data_validator import DataValidator
+
+
+def test_column_profile_levels_and_approximate_distinct_counts():
+    """
+    Test the diagnostics levels of the column profiles and the approximate distinct counts.
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'rpm': np.round(rng.normal(1500, 300, 50000)),
+        'torque': np.where(rng.random(50000) < 0.5, np.nan, rng.normal(100, 5, 50000)),
+        'fuel': rng.choice(['DF', 'HVO', 'RME'], 50000),
+        'empty': np.nan,
+    })
+
+    basic = DataValidator([df], [[]], diagnostics_level='basic')
+    profile = basic.get_metadata([df], message_for_logs="test")[0]
+    assert 'Unique Values' not in profile.columns
+    assert list(profile['Null Count']) == list(df.isnull().sum())
+
+    full = DataValidator([df], [[]], diagnostics_level='full')
+    assert list(full.column_profile(df)['Unique Values']) == list(df.nunique())
+    assert DataValidator([df], [[]], diagnostics_level='off').get_metadata([df]) == []
+
+    approx = approx_distinct_counts(df)
+    exact = df.nunique()
+    assert approx['empty'] == 0 and approx['fuel'] == 3
+    assert ((approx - exact).abs() <= 0.05 * exact).all()
+    # The registers do not depend on how the rows are chunked
+    assert approx_distinct_counts(df, chunk_rows=7000).equals(approx)
@@ -0,0 +1,310 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.stable_window_engine import (
+    StableWindowEngine, intersect_intervals, intervals_mask, mask_to_intervals, segment_statistics
+)
+from src.data_filter import DataFilter
+from src.metadata_manager import MetadataManager
+from src.segment_summary import save_segments, summarize_segments
+from src.streaming_stable_detector import StreamingStableDetector
+from src.time_synchronizer import TimeSynchronizer
+from src.utils.rolling_window import _deque_range, _sparse_table_range, rolling_range, window_starts
+
+
+@pytest.fixture
+def step_profile():
+    """
+    Fixture with a 1 Hz recording: rpm steps 800 -> 1200 -> 1600, torque ramps in the middle.
+    """
+    n = 60
+    rpm = np.repeat([800.0, 1200.0, 1600.0], n // 3)
+    torque = np.concatenate([np.full(20, 50.0), np.linspace(50.0, 150.0, 20), np.full(20, 150.0)])
+    return pd.DataFrame({
+        'Time': pd.to_datetime(np.arange(n) * 1000, unit='ms'),
+        'Obroty[obr/min]': rpm,
+        'Moment obrotowy[Nm]': torque,
+    })
+
+
+def _pandas_stable_mask(df, column, threshold, window):
+    rolling_object = df.set_index('Time')[column].rolling(window, min_periods=1)
+    return ((rolling_object.max() - rolling_object.min()) <= threshold).to_numpy()
+
+
+def test_engine_matches_pandas_rolling_mask(step_profile):
+    """
+    Test that the runs of the engine cover exactly the samples of the pandas rolling criterion.
+    """
+    rules = {'Obroty[obr/min]': (20, '8000ms'), 'Moment obrotowy[Nm]': (1.6, '5000ms')}
+    results = StableWindowEngine(step_profile, rules).run()
+    for column, (threshold, window) in rules.items():
+        runs = results[column]
+        mask = np.zeros(len(step_profile), dtype=bool)
+        for start, end in zip(runs['start_index'], runs['end_index']):
+            mask[start:end + 1] = True
+        assert np.array_equal(mask, _pandas_stable_mask(step_profile, column, threshold, window)), (
+            f"Stable samples of '{column}' differ from the rolling max - min criterion."
+        )
+
+
+def test_engine_run_means(step_profile):
+    """
+    Test the run boundaries and per-run means for the rpm steps.
+    """
+    runs = StableWindowEngine(step_profile, {'Obroty[obr/min]': (20, '8000ms')}).run()['Obroty[obr/min]']
+    assert list(runs['start_index']) == [0, 27, 47]
+    assert list(runs['end_index']) == [19, 39, 59]
+    assert np.allclose(runs['mean'], [800.0, 1200.0, 1600.0])
+    assert runs['start_time'][1] == step_profile['Time'].iloc[27]
+
+
+def test_engine_run_means_equal_pandas_mean_of_every_run():
+    """
+    Test that the run means are exactly the pandas means of the run slices (the rounded stable levels
+    written to the metadata must not drift), also with NaN samples.
+    """
+    rng = np.random.default_rng(1)
+    n = 200000
+    rpm = np.round(np.repeat([1500.0, 1899.65, 2400.0, 1600.0], n // 4) + rng.normal(0, 2, n), 1)
+    rpm[rng.random(n) < 0.05] = np.nan
+    df = pd.DataFrame({'Time': pd.to_datetime(np.arange(n) * 20, unit='ms'), 'Obroty[obr/min]': rpm})
+    runs = StableWindowEngine(df, {'Obroty[obr/min]': (20, '8000ms')}).run()['Obroty[obr/min]']
+
+    expected = [df['Obroty[obr/min]'].iloc[start:end + 1].mean()
+                for start, end in zip(runs['start_index'], runs['end_index'])]
+    assert len(expected) == 4
+    assert list(runs['mean']) == expected
+
+
+def test_stable_level_means_are_rounded_like_the_baseline(tmp_path):
+    """
+    Test that the stable level means in the metadata are rounded as np.float64 (299.95 -> 300.0, not 299.9).
+    """
+    df = pd.DataFrame({'Time': pd.to_datetime(np.arange(16) * 1000, unit='ms'), 'Obroty[obr/min]': 299.95})
+    detectors = [{'name': 'rotation', 'type': 'stable', 'column': 'Obroty[obr/min]',
+                  'threshold': 20, 'window': '8000ms', 'unit': 'RPM', 'decimals': 1}]
+    data_filter = DataFilter(df, required_columns=[], detectors=detectors,
+                             metadata_manager=MetadataManager(metadata_dir=str(tmp_path)))
+    data_filter.step_5_file_name = 'step 5'
+    data_filter.filter_all_stable_periods()
+
+    assert round(float(np.float64(299.95)), 1) == 299.9
+    assert data_filter.metadata_manager.metadata['step 5']['Stable rotation levels extracted. Average values:'] == [300.0]
+
+
+def test_interval_intersection_matches_set_intersection():
+    """
+    Test that intersecting run intervals selects the same samples as intersecting the time sets.
+    """
+    rng = np.random.default_rng(0)
+    times = pd.to_datetime(np.sort(rng.choice(100000, size=2000, replace=False)), unit='ms').to_numpy()
+    masks = [rng.random(len(times)) > 0.2 for _ in range(3)]
+    # Smooth the masks into runs
+    masks = [pd.Series(mask).rolling(5, min_periods=1).min().astype(bool).to_numpy() for mask in masks]
+
+    intervals = mask_to_intervals(times, masks[0])
+    for mask in masks[1:]:
+        intervals = intersect_intervals(intervals, mask_to_intervals(times, mask))
+
+    expected = set.intersection(*[set(times[mask]) for mask in masks])
+    selected = times[intervals_mask(times, intervals)]
+    assert set(selected) == expected, "Interval intersection should select the same times as set intersection."
+    assert np.all(intervals[:, 0] <= intervals[:, 1]), "Intervals should be closed [start, end]."
+
+
+def test_time_synchronizer_policies():
+    """
+    Test the 'nearest', 'last' and 'mean' policies on a 1 Hz grid with a 10 Hz fast sensor.
+    """
+    df = pd.DataFrame({
+        'Czas [ms]': np.concatenate([np.arange(0, 5000, 1000.0), np.full(45, np.nan)]),
+        'Obroty[obr/min]': np.concatenate([np.arange(800.0, 805.0), np.full(45, np.nan)]),
+        'Czas [ms].1': np.arange(0, 5000, 100.0) + 10,
+        'Moment obrotowy[Nm]': np.arange(50, dtype=float),
+    })
+    sensors = [['Czas [ms]', 'Obroty[obr/min]'], ['Czas [ms].1', 'Moment obrotowy[Nm]']]
+    synchronizer = TimeSynchronizer(df, sensors)
+    grid = synchronizer.build_grid('Czas [ms]')
+
+    nearest = synchronizer.synchronize(grid)
+    assert list(nearest['Obroty[obr/min]']) == [800.0, 801.0, 802.0, 803.0, 804.0]
+    assert list(nearest['Moment obrotowy[Nm]']) == [0.0, 10.0, 20.0, 30.0, 40.0]
+
+    last = synchronizer.synchronize(grid, policies={'Moment obrotowy[Nm]': 'last'})
+    assert np.isnan(last['Moment obrotowy[Nm]'].iloc[0]), "No torque sample at or before t=0."
+    assert list(last['Moment obrotowy[Nm]'].iloc[1:]) == [9.0, 19.0, 29.0, 39.0]
+
+    mean = synchronizer.synchronize(grid, policies={'Moment obrotowy[Nm]': 'mean'})
+    # Bins are [t - 500, t + 500) around every grid point
+    assert np.allclose(mean['Moment obrotowy[Nm]'], [2.0, 9.5, 19.5, 29.5, 39.5])
+    assert synchronizer.synchronize(grid, default_policy='auto').equals(mean), (
+        "'auto' should aggregate the fast sensor and take the nearest value of the slow one."
+    )
+
+
+def test_rolling_range_kernel_matches_pandas():
+    """
+    Test the rolling max - min kernel against pandas time-based rolling, with gaps, duplicates and NaN values.
+    """
+    rng = np.random.default_rng(1)
+    times = pd.to_datetime(np.cumsum(rng.integers(0, 3000, 500)), unit='ms').to_numpy()
+    values = rng.normal(size=500).round(1)
+    values[rng.random(500) < 0.1] = np.nan
+    rolling_object = pd.Series(values, index=pd.DatetimeIndex(times)).rolling('8000ms', min_periods=1)
+    expected = (rolling_object.max() - rolling_object.min()).to_numpy()
+
+    starts = window_starts(times, '8000ms')
+    assert np.array_equal(_sparse_table_range(values, starts), expected, equal_nan=True)
+    assert np.array_equal(rolling_range(times, {'x': values}, '8000ms')['x'], expected, equal_nan=True)
+
+
+def test_deque_kernel_matches_sparse_table():
+    """
+    Test the monotonic-deque kernel (the numba path, run here as plain Python) against the sparse table fallback,
+    with NaN runs, empty windows, a window of the whole recording and an empty input.
+    """
+    # The Python function behind the numba kernel, so the test also runs without numba
+    deque_range = getattr(_deque_range, 'py_func', _deque_range)
+    rng = np.random.default_rng(2)
+    for n in (0, 1, 2, 17, 2000):
+        times = pd.to_datetime(np.cumsum(rng.integers(0, 4000, n)), unit='ms').to_numpy()
+        values = rng.normal(size=n).round(1)
+        values[rng.random(n) < 0.2] = np.nan
+        values[n // 3:n // 3 + 25] = np.nan
+        for window in ('1ms', '3000ms', '8000ms', '10000000ms'):
+            starts = window_starts(times, window)
+            assert np.array_equal(deque_range(values, starts), _sparse_table_range(values, starts), equal_nan=True), (
+                f"Kernels differ for n={n}, window={window}."
+            )
+
+
+def test_streaming_detector_matches_batch_mask(step_profile):
+    """
+    Test that feeding the recording in uneven batches gives the segments of the batch stable mask.
+    """
+    rules = {'Obroty[obr/min]': (20, '8000ms'), 'Moment obrotowy[Nm]': (1.6, '5000ms')}
+    mask = np.logical_and.reduce([
+        _pandas_stable_mask(step_profile, column, threshold, window) for column, (threshold, window) in rules.items()
+    ])
+
+    detector = StreamingStableDetector(rules)
+    segments = []
+    for start, end in zip([0, 7, 8, 25, 41], [7, 8, 25, 41, 60]):
+        segments += detector.update(step_profile.iloc[start:end])
+    segments += detector.flush()
+
+    expected = mask_to_intervals(step_profile['Time'].to_numpy(), mask)
+    assert [(s['start_time'], s['end_time']) for s in segments] == [
+        (pd.Timestamp(start), pd.Timestamp(end)) for start, end in expected
+    ]
+    assert [s['samples'] for s in segments] == [20, 13], "The torque ramp covers the 1200 rpm step."
+    assert np.allclose([s['mean']['Obroty[obr/min]'] for s in segments], [800.0, 1600.0])
+    assert np.allclose([s['mean']['Moment obrotowy[Nm]'] for s in segments], [50.0, 150.0])
+    assert len(detector._tail_times) <= 9, "Only the last window should be kept."
+
+
+def test_segment_summary_one_row_per_interval(step_profile):
+    """
+    Test that the summary has one row per stable interval with per-channel statistics and the static columns.
+    """
+    df = step_profile.assign(LHV=42.8)
+    mask = _pandas_stable_mask(df, 'Obroty[obr/min]', 20, '8000ms')
+    intervals = mask_to_intervals(df['Time'].to_numpy(), mask)
+    summary = summarize_segments(df[mask], intervals, static_columns=['LHV'], metadata={'fuel': 'DF'})
+
+    assert len(summary) == len(intervals) == 3
+    assert list(summary['Obroty[obr/min]_mean']) == [800.0, 1200.0, 1600.0]
+    assert list(summary['Obroty[obr/min]_count']) == [20, 13, 13]
+    assert np.allclose(summary['Moment obrotowy[Nm]_max'], [50.0, 150.0, 150.0])
+    assert list(summary['duration_s']) == [19.0, 12.0, 12.0]
+    assert (summary['fuel'] == 'DF').all() and (summary['LHV'] == 42.8).all()
+    assert 'LHV_mean' not in summary.columns, "Static columns should be copied, not aggregated."
+
+
+def test_segment_summary_is_empty_when_stable_detection_finds_nothing(step_profile, tmp_path):
+    """
+    Test that a file without stable periods gets an empty summary instead of failing the pipeline.
+    """
+    detectors = [{'name': 'torque', 'type': 'stable', 'column': 'Moment obrotowy[Nm]',
+                  'threshold': 1.6, 'window': '8000ms', 'unit': 'Nm', 'decimals': 1}]
+    data_filter = DataFilter(step_profile.drop(columns=['Moment obrotowy[Nm]']), required_columns=[], detectors=detectors)
+    filtered_df = data_filter.filter_all_stable_periods()
+    assert filtered_df.empty and data_filter.stable_intervals is None
+
+    summary = summarize_segments(filtered_df, data_filter.stable_intervals)
+    assert summary.empty
+    save_segments(summary, str(tmp_path / 'segments' / 'a.parquet_segments.parquet'))
+    assert pd.read_parquet(tmp_path / 'segments' / 'a.parquet_segments.parquet').empty
+
+
+def test_detector_registry_intersects_all_detectors(step_profile):
+    """
+    Test that filter_all_stable_periods keeps exactly the rows accepted by every configured detector
+    and that invalid detector registries are rejected.
+    """
+    df = step_profile.assign(**{'Temp. oleju w misce[°C]': np.where(np.arange(60) < 10, 40.0, 80.0)})
+    detectors = [
+        {'name': 'rotation', 'type': 'stable', 'column': 'Obroty[obr/min]',
+         'threshold': 20, 'window': '8000ms', 'unit': 'RPM', 'decimals': 1},
+        {'name': 'torque', 'type': 'stable', 'column': 'Moment obrotowy[Nm]',
+         'threshold': 1.6, 'window': '5000ms', 'unit': 'Nm', 'decimals': 1},
+        {'name': 'high temperature oil', 'type': 'min_value', 'column': 'Temp. oleju w misce[°C]',
+         'min_value': 50, 'unit': '°C'},
+    ]
+    expected = (
+        _pandas_stable_mask(df, 'Obroty[obr/min]', 20, '8000ms')
+        & _pandas_stable_mask(df, 'Moment obrotowy[Nm]', 1.6, '5000ms')
+        & (df['Temp. oleju w misce[°C]'] >= 50).to_numpy()
+    )
+    filtered_df = DataFilter(df, required_columns=[], detectors=detectors).filter_all_stable_periods()
+    assert list(filtered_df.index) == list(np.flatnonzero(expected))
+
+    with pytest.raises(ValueError):
+        DataFilter(df, required_columns=[], detectors=[{'name': 'x', 'type': 'unknown'}]).filter_all_stable_periods()
+    with pytest.raises(ValueError, match="unknown keys \\['treshold'\\]"):
+        DataFilter(df, required_columns=[], detectors=[dict(detectors[0], treshold=20)])
+    with pytest.raises(ValueError, match="both 'stable' detectors"):
+        DataFilter(df, required_columns=[], detectors=[detectors[0], dict(detectors[0], name='rotation 2')])
+
+
+def test_min_value_detector_rows_are_kept_when_no_stable_periods_overlap(step_profile):
+    """
+    Test that the rows below the min_value threshold are removed from the DataFrame (as by the former
+    oil temperature filter) when every detector finds periods but their intersection is empty.
+    """
+    oil = np.where((np.arange(60) >= 20) & (np.arange(60) < 27), 80.0, 40.0)
+    df = step_profile.assign(**{'Temp. oleju w misce[°C]': oil})
+    detectors = [
+        {'name': 'rotation', 'type': 'stable', 'column': 'Obroty[obr/min]',
+         'threshold': 20, 'window': '8000ms', 'unit': 'RPM', 'decimals': 1},
+        {'name': 'high temperature oil', 'type': 'min_value', 'column': 'Temp. oleju w misce[°C]',
+         'min_value': 50, 'unit': '°C'},
+    ]
+    data_filter = DataFilter(df, required_columns=[], detectors=detectors)
+
+    assert data_filter.filter_all_stable_periods().empty
+    assert list(data_filter.df.index) == list(range(20, 27))
+    assert data_filter.stable_intervals is None
+
+
+def test_segment_statistics_matches_slices():
+    """
+    Test the segment means against slicing every segment, with NaN values and an empty segment, and that
+    they equal pandas' mean of every slice exactly at the end of a long recording.
+    """
+    values = np.array([1.0, 2.0, np.nan, 4.0, 5.0, np.nan, np.nan, 8.0])
+    start_index, end_index = np.array([0, 3, 5, 7]), np.array([2, 4, 6, 7])
+    statistics = segment_statistics(values, start_index, end_index)
+
+    expected = [np.nanmean(values[start:end + 1]) if not np.isnan(values[start:end + 1]).all() else np.nan
+                for start, end in zip(start_index, end_index)]
+    assert np.array_equal(statistics['mean'], expected, equal_nan=True)
+    assert list(statistics['count']) == [3, 2, 2, 1]
+    assert list(statistics['valid_count']) == [2, 2, 0, 1]
+
+    values = np.round(np.random.default_rng(0).normal(1800, 30, 400000), 1)
+    start_index = np.arange(350000, 399000, 1000)
+    statistics = segment_statistics(values, start_index, start_index + 699)
+    expected = [pd.Series(values[start:start + 700]).mean() for start in start_index]
+    assert list(statistics['mean']) == expected
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+from src.data_loader import DataLoader
+from src.metadata_manager import MetadataManager
+
+
+@pytest.fixture
+def raw_parquet(tmp_path):
+    """
+    Fixture with a small raw file laid out like the bench exports: every data column
+    is preceded by its own time column.
+    """
+    df = pd.DataFrame({
+        'Czas [ms]': [0.0, 100.0, 200.0],
+        'Obroty[obr/min]': [800.0, 801.0, 802.0],
+        'Czas [ms].1': [0.0, 100.0, 200.0],
+        'Moc[kW]': [10.0, 11.0, 12.0],
+        'Czas [ms].2': [5.0, 105.0, 205.0],
+        'Moment obrotowy[Nm]': [100.0, 101.0, 102.0],
+    })
+    df.to_parquet(tmp_path / 'raw.parquet', index=False)
+    return tmp_path
+
+
+@pytest.fixture
+def data_loader(raw_parquet):
+    metadata_dir = raw_parquet / 'metadata'
+    metadata_dir.mkdir()
+    metadata_manager = MetadataManager(metadata_dir=str(metadata_dir))
+    return DataLoader(
+        raw_data_path=str(raw_parquet),
+        names_of_files_under_procession=['raw.parquet', 'empty', 'DF'],
+        metadata_manager=metadata_manager
+    )
+
+
+def test_load_data_reads_all_columns_by_default(data_loader):
+    """
+    Test that load_data without a column list reads the whole file.
+    """
+    df = data_loader.load_data('raw.parquet')
+    assert df.shape == (3, 6), "All columns should be loaded."
+
+
+def test_load_data_projects_required_columns_with_time_pairs(data_loader):
+    """
+    Test that only the required columns and their paired time columns are read.
+    """
+    df = data_loader.load_data('raw.parquet', columns=['Moment obrotowy[Nm]', 'Obroty[obr/min]', 'Missing[-]'])
+    assert list(df.columns) == ['Czas [ms]', 'Obroty[obr/min]', 'Czas [ms].2', 'Moment obrotowy[Nm]'], (
+        "Projected columns should keep schema order and include the paired time columns."
+    )
+
+
+def test_parallel_load_files_keeps_order_and_isolates_errors(data_loader):
+    """
+    Test the bulk loader: results follow the input order, failed files give None,
+    and columns can be projected into Arrow tables.
+    """
+    results = data_loader.parallel_load_files(['raw.parquet', 'missing.parquet', 'raw.parquet'], num_workers=2)
+    assert results[1] is None, "A missing file should not stop the other files."
+    pd.testing.assert_frame_equal(results[0], pd.read_parquet(data_loader.raw_data_path + '/raw.parquet'))
+
+    tables = data_loader.parallel_load_files(['raw.parquet'], columns=['Moc[kW]'], as_arrow=True)
+    assert tables[0].column_names == ['Moc[kW]']
+    tables = data_loader.parallel_load_files(['raw.parquet'], columns=['Moc[kW]'], pair_time_columns=True, as_arrow=True)
+    assert tables[0].column_names == ['Czas [ms].1', 'Moc[kW]']
@@ -0,0 +1,88 @@
+import threading
+from src.log_manager import LogManager
+from src.pipeline_profiler import PipelineProfiler
+from src.utils.query_events import load_events, rows_lost_in_step
+
+
+def test_async_log_manager_writes_queued_records_and_skips_disabled_messages(tmp_path):
+    """
+    Test that the asynchronous LogManager writes every queued record and never builds disabled DEBUG messages.
+    """
+    log_manager = LogManager(logs_dir=str(tmp_path), asynchronous=True, level='INFO')
+    built = []
+    for idx in range(100):
+        log_manager.log_info(f"record {idx}")
+        log_manager.log_debug(lambda: built.append(idx) or "debug detail")
+    log_manager.flush()
+    with open(log_manager.log_file_path, 'r', encoding='utf-8') as f:
+        log_text = f.read()
+    log_manager.close()
+
+    assert all(f"record {idx}" in log_text for idx in range(100))
+    assert "debug detail" not in log_text and built == []
+
+
+def test_async_log_manager_close_writes_pending_records_and_stops_listeners(tmp_path):
+    """
+    Test that close() writes the records still in the queue and stops the listener threads, also when called twice.
+    """
+    log_manager = LogManager(logs_dir=str(tmp_path), asynchronous=True, level='INFO', structured_events=True)
+    handlers = [handler for handler in log_manager._handlers() if hasattr(handler, 'listener')]
+    assert len(handlers) == 2
+    for idx in range(100):
+        log_manager.log_info(f"record {idx}")
+    log_manager.log_event('step', rows_in=10, rows_out=8)
+    log_manager.close()
+    log_manager.close()
+    log_manager.flush()
+
+    with open(log_manager.log_file_path, 'r', encoding='utf-8') as f:
+        log_text = f.read()
+    assert all(f"record {idx}" in log_text for idx in range(100))
+    assert [event['rows_out'] for event in log_manager.read_events()] == [8]
+    assert not any(getattr(handler, 'listener_running', False) for handler in handlers)
+
+
+def test_async_log_manager_listeners_stop_for_forking_and_keep_the_queued_records(tmp_path):
+    """
+    Test that no listener thread runs between stop_listeners() and start_listeners() and that the records
+    logged meanwhile are written afterwards.
+    """
+    log_manager = LogManager(logs_dir=str(tmp_path), asynchronous=True, level='INFO')
+    handlers = [handler for handler in log_manager._handlers() if hasattr(handler, 'listener')]
+    log_manager.log_info("before fork")
+    threads = threading.active_count()
+    log_manager.stop_listeners()
+    assert threading.active_count() == threads - len(handlers)
+    log_manager.log_info("while forking")
+    log_manager.start_listeners()
+    log_manager.close()
+
+    with open(log_manager.log_file_path, 'r', encoding='utf-8') as f:
+        log_text = f.read()
+    assert "before fork" in log_text and "while forking" in log_text
+
+
+def test_structured_events_are_queryable_per_file_and_step(tmp_path):
+    """
+    Test that the profiled steps are written as structured events and ranked by the rows they lost.
+    """
+    log_manager = LogManager(logs_dir=str(tmp_path), structured_events=True)
+    profiler = PipelineProfiler(log_manager=log_manager)
+    for file_id, rows_out in ((1, 90), (2, 40)):
+        log_manager.set_context(file_id=file_id, fuel='DF')
+        with profiler.step(file_id, 'stable_detection', rows_in=100) as record:
+            log_manager.log_event('stable_detector', detector='rotation', intervals=3)
+            record['rows_out'] = rows_out
+    log_manager.log_error("broken file")
+    worker_events = [{'run_id': 'worker', 'file_id': 3, 'step': 'stable_detection', 'event': 'step',
+                      'rows_in': 100, 'rows_out': 70}]
+    log_manager.append_events(worker_events)
+    log_manager.close()
+
+    events = load_events(logs_dir=str(tmp_path))
+    assert set(events['run_id']) == {log_manager.run_id}
+    assert events.loc[events['event'] == 'stable_detector', 'step'].tolist() == ['stable_detection'] * 2
+    assert events.loc[events['event'] == 'error', 'message'].tolist() == ["broken file"]
+    lost = rows_lost_in_step(events, 'stable_detection')
+    assert lost['file_id'].tolist() == [2, 3, 1] and lost['rows_lost'].tolist() == [60, 30, 10]
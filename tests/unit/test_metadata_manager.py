@@ -0,0 +1,18 @@
+import json
+from src.metadata_manager import MetadataManager
+
+
+def test_orphan_metadata_journal_is_compacted_on_startup(tmp_path):
+    """
+    Test that the journal of a run that crashed before close() is compacted by the next run.
+    """
+    crashed_run = MetadataManager(metadata_dir=str(tmp_path), buffered=True)
+    crashed_run.update_metadata('step 1', 'status', 'completed')
+    crashed_run.flush()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['metadata_v1.0.jsonl']
+
+    next_run = MetadataManager(metadata_dir=str(tmp_path), buffered=True)
+    assert next_run.version == 'v1.1'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['metadata_v1.0.json']
+    with open(tmp_path / 'metadata_v1.0.json', 'r', encoding='utf-8') as f:
+        assert json.load(f) == {'step 1': {'status': 'completed'}}
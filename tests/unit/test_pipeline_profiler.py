@@ -0,0 +1,28 @@
+import pytest
+from src.pipeline_profiler import PipelineProfiler
+
+
+def test_pipeline_profiler_records_and_summary(tmp_path):
+    """
+    Test that the profiler records every step (also failing ones) and sums them per step.
+    """
+    profiler = PipelineProfiler()
+    for item_id in (1, 2):
+        with profiler.step(item_id, 'load') as record:
+            record['rows_out'] = 100
+        with profiler.step(item_id, 'filter', rows_in=100) as record:
+            record['rows_out'] = 10
+    with pytest.raises(RuntimeError):
+        with profiler.step(3, 'load'):
+            raise RuntimeError("broken file")
+
+    assert len(profiler.records) == 5
+    assert all(record['wall_s'] >= 0 and record['cpu_s'] >= 0 for record in profiler.records)
+    summary = profiler.summary().set_index('step')
+    assert summary.loc['load', 'items'] == 3 and summary.loc['load', 'errors'] == 1
+    assert summary.loc['load', 'rows_out'] == 200
+    assert summary.loc['filter', 'rows_in'] == 200 and summary.loc['filter', 'rows_out'] == 20
+    assert abs(summary['wall_share'].sum() - 1) < 1e-9
+
+    profiler.save(str(tmp_path / 'profile.json'))
+    assert (tmp_path / 'profile.json').exists()
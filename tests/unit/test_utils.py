@@ -0,0 +1,139 @@
+import json
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from src.data_loader import DataLoader
+from src.metadata_manager import MetadataManager
+from src.utils.query_events import list_runs, load_events, rows_lost_in_step
+from src.utils.into_one import columns_in_dfs, find_segment_files, write_combined_segments, read_dataset, unified_schema, write_partitioned_dataset
+from src.utils.main_raw_into_parquet import compact_schema, convert_csv_to_parquet
+
+
+def test_ingest_reads_a_column_as_text_when_a_later_chunk_has_text(tmp_path):
+    """
+    Test that a file whose later chunk has text in a numeric column is converted, not rejected.
+    """
+    csv_file_path = tmp_path / 'bench.csv'
+    csv_file_path.write_text(
+        "Czas [ms];Obroty[obr/min];Czas [ms];Status[-]\n"
+        "0;800.5;0;1\n100;801;100;2\n200;802;200;ERR\n300;;300;4\n",
+        encoding='utf-8'
+    )
+    rows = convert_csv_to_parquet(str(csv_file_path), str(tmp_path / 'bench.parquet'), encoding='utf-8', chunk_rows=2)
+
+    df = pd.read_parquet(tmp_path / 'bench.parquet')
+    assert rows == 4
+    assert df['Status[-]'].tolist() == ['1', '2', 'ERR', '4']
+    assert df['Obroty[obr/min]'].tolist()[:3] == [800.5, 801.0, 802.0]
+
+
+def test_compact_ingest_types_and_fixed_column_names(tmp_path):
+    """
+    Test that the ingest stage stores compact types and that the loader keeps the stored column names.
+    """
+    csv_file_path = tmp_path / 'bench.csv'
+    csv_file_path.write_text(
+        "Czas [ms];Obroty[obr/min];Czas [ms];Dopełnianie[-];Czas [ms];Temp. spalin[°C];Czas [ms];MAF[kg/h]\n"
+        "0;800.5;0;0;0;0.123456789;0;120.5\n"
+        "100;801.25;100;1;100;0.2;100;121.25\n"
+        "200;;200;1;;;200;\n",
+        encoding='utf-8'
+    )
+    convert_csv_to_parquet(str(csv_file_path), str(tmp_path / 'bench.parquet'), encoding='utf-8', chunk_rows=2,
+                           compact=True)
+
+    schema = pq.read_schema(tmp_path / 'bench.parquet')
+    types = dict(zip(schema.names, (str(t) for t in schema.types)))
+    assert types == {
+        'Czas [ms]': 'int64', 'Obroty[obr/min]': 'double', 'Czas [ms].1': 'int64',
+        'Dopełnianie[-]': 'uint8', 'Czas [ms].2': 'int64', 'Temp. spalin[°C]': 'double',
+        'Czas [ms].3': 'int64', 'MAF[kg/h]': 'float',
+    }, "Time should be int64, flags uint8, short decimals float32, long decimals and detector channels float64."
+
+    metadata_manager = MetadataManager(metadata_dir=str(tmp_path))
+    loader = DataLoader(raw_data_path=str(tmp_path), names_of_files_under_procession=['bench.parquet', 'empty', 'DF'],
+                        metadata_manager=metadata_manager)
+    df = loader.load_data('bench.parquet', columns=['Obroty[obr/min]'])
+    assert list(df.columns) == ['Czas [ms]', 'Obroty[obr/min]']
+    assert df['Obroty[obr/min]'].iloc[1] == 801.25
+
+
+def test_compact_schema_keeps_detector_channels_with_only_0_and_1_as_float64(tmp_path):
+    """
+    Test that a detector channel is not stored as a uint8 flag when it only holds 0 and 1.
+    """
+    pd.DataFrame({
+        'Moment obrotowy[Nm]': [0.0, 1.0, 1.0, np.nan],
+        'Dopełnianie[-]': [0.0, 1.0, 1.0, np.nan],
+    }).to_parquet(tmp_path / 'flags.parquet', index=False)
+
+    schema = compact_schema(pq.ParquetFile(tmp_path / 'flags.parquet'))
+    assert str(schema.field('Moment obrotowy[Nm]').type) == 'double'
+    assert str(schema.field('Dopełnianie[-]').type) == 'uint8'
+
+
+def test_partitioned_dataset_prunes_by_fuel_and_year(tmp_path):
+    """
+    Test that the merged dataset is partitioned by fuel and test date and can be filtered on them,
+    and that differing or missing columns are unified instead of skipping the file.
+    """
+    processed = {}
+    for name, rpm, cetane in [('A - 2023-05.parquet', 800.0, [51, 51]), ('B - 2024-01.parquet', 1650.0, [59.2, 59.2])]:
+        df = pd.DataFrame({col: [1.0, 2.0] for col in columns_in_dfs})
+        df['Time'] = pd.to_datetime([0, 1000], unit='ms')
+        df['RPM'] = rpm
+        df['Cetane number'] = cetane
+        if name.startswith('B'):
+            df = df.drop(columns=['LHV'])
+        processed[name] = tmp_path / f'{name}_tr_f.parquet'
+        df.to_parquet(processed[name], index=False)
+    schema, report = unified_schema([str(path) for path in processed.values()])
+    assert set(report['type_conflicts']) == {'Cetane number'}
+    assert report['missing_columns'] == {'LHV': ['B - 2024-01.parquet_tr_f.parquet']}
+    partitions = {
+        'A - 2023-05.parquet_tr_f.parquet': {'fuel': 'DF', 'test_year': 2023, 'test_month': 5},
+        'B - 2024-01.parquet_tr_f.parquet': {'fuel': 'HVO25', 'test_year': 2024, 'test_month': 1},
+    }
+    dataset_dir = str(tmp_path / 'dataset')
+    rows = write_partitioned_dataset([str(path) for path in processed.values()], dataset_dir, partitions, rpm_band_width=400)
+
+    assert rows == 4
+    assert (tmp_path / 'dataset' / 'fuel=HVO25' / 'test_year=2024' / 'test_month=1' / 'rpm_band=1600').is_dir()
+    df = read_dataset(dataset_dir, filters=[('test_year', '=', 2024)])
+    assert list(df['fuel'].astype(str).unique()) == ['HVO25']
+    assert df['Cetane number'].dtype == 'float64'
+    assert df['LHV'].isna().all(), "The missing column should be filled with nulls."
+
+
+def test_combined_segments_do_not_grow_on_rerun(tmp_path):
+    """
+    Test that combining the segment summaries again does not merge the combined file into itself.
+    """
+    for name, segments in (('a.parquet', 2), ('b.parquet', 3)):
+        pd.DataFrame({'segment': range(segments)}).to_parquet(tmp_path / f'{name}_segments.parquet', index=False)
+    target_path = str(tmp_path / 'combined_segments.parquet')
+
+    for _ in range(2):
+        rows = write_combined_segments(find_segment_files(str(tmp_path), target_path), target_path)
+        assert rows == 5
+    assert len(pd.read_parquet(target_path)) == 5
+
+
+def test_empty_events_file_gives_empty_tables(tmp_path):
+    """
+    Test that a run without events loads as an empty frame and is not picked as the latest run.
+    """
+    (tmp_path / 'events_2024-05-01_10-00-00.jsonl').write_text(
+        json.dumps({'time': '2024-05-01T10:00:00', 'run_id': '2024-05-01_10-00-00', 'file_id': 1,
+                    'step': 'load', 'event': 'error', 'message': 'broken file'}) + '\n', encoding='utf-8')
+    (tmp_path / 'events_2024-05-02_10-00-00.jsonl').write_text('', encoding='utf-8')
+
+    assert list_runs(str(tmp_path)) == ['2024-05-01_10-00-00']
+    assert load_events(logs_dir=str(tmp_path))['run_id'].tolist() == ['2024-05-01_10-00-00']
+
+    empty = load_events('2024-05-02_10-00-00', logs_dir=str(tmp_path))
+    assert empty.empty and {'time', 'run_id', 'file_id', 'step', 'event'} <= set(empty.columns)
+    assert empty[empty['event'] == 'error'].empty
+    # Neither a run without events nor a run without step events has rows lost
+    assert rows_lost_in_step(empty).empty
+    assert rows_lost_in_step(load_events(logs_dir=str(tmp_path))).empty